@@ -1,7 +1,6 @@
 import logging
 import streamlit as st
 from config_loader import load_config
-STREAMLIT_SERVER_MAX_UPLOAD_SIZE=10
 # Configure basic logging for the app
 logging.basicConfig(
     level=logging.INFO,
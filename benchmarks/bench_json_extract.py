@@ -0,0 +1,78 @@
+"""Micro-benchmark: single-pass JSON extraction vs. the old regex fallback chain
+
+Run from the project root:
+    python benchmarks/bench_json_extract.py
+"""
+
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from llm.json_utils import extract_json  # noqa: E402
+
+RECORDED = json.loads((ROOT / "benchmarks" / "data" / "recorded_responses.json").read_text())
+
+
+def legacy_extract(raw_content):
+    """The regex chain LLMClient used before the single-pass scanner"""
+    try:
+        return json.loads(raw_content)
+    except json.JSONDecodeError:
+        pass
+    for pattern, flags, group in (
+        (r"```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```", re.DOTALL | re.IGNORECASE, 1),
+        (r"\{.*?\}", re.DOTALL, 0),
+        (r"\[.*?\]", re.DOTALL, 0),
+    ):
+        match = re.search(pattern, raw_content, flags)
+        if match:
+            try:
+                return json.loads(match.group(group))
+            except json.JSONDecodeError:
+                continue
+    return {}
+
+
+def scanner_extract(raw_content):
+    """The current path: direct parse, then one single-pass scan"""
+    try:
+        return json.loads(raw_content)
+    except json.JSONDecodeError:
+        return extract_json(raw_content)
+
+
+def build_cases():
+    cases = dict(RECORDED)
+    roles = json.loads(RECORDED["clean_roles"])["roles"]
+    # A long answer: 50 roles behind a chatty preamble
+    cases["prose_50_roles"] = "Here are your roles:\n" + json.dumps({"roles": roles * 13}, indent=2)
+    # Adversarial: thousands of unbalanced braces ahead of the real payload
+    cases["adversarial_braces"] = "{ [ " * 2000 + "\n" + RECORDED["fenced_roles"]
+    # No JSON at all: the non-greedy DOTALL regexes rescan the tail from every "{"
+    cases["unbalanced_no_json"] = "{ " * 5000 + "the model gave up"
+    return cases
+
+
+def _time_us(func):
+    number, total = timeit.Timer(func).autorange()
+    return total / number * 1e6
+
+
+def main():
+    cases = build_cases()
+    print(f"{'case':<22} {'chars':>8} {'legacy us':>11} {'scanner us':>11} {'legacy ok':>10} {'scanner ok':>11}")
+    for name, text in cases.items():
+        legacy_us = _time_us(lambda: legacy_extract(text))
+        scanner_us = _time_us(lambda: scanner_extract(text))
+        legacy_ok = bool(legacy_extract(text))
+        scanner_ok = scanner_extract(text) is not None
+        print(f"{name:<22} {len(text):>8} {legacy_us:>11.1f} {scanner_us:>11.1f} {str(legacy_ok):>10} {str(scanner_ok):>11}")
+
+
+if __name__ == "__main__":
+    main()
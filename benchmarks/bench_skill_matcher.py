@@ -0,0 +1,77 @@
+"""Micro-benchmark: local skill extraction (word-level Aho-Corasick) vs. one regex search per taxonomy phrase
+
+Run from the project root:
+    python benchmarks/bench_skill_matcher.py
+"""
+
+import json
+import re
+import sys
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.skill_matcher import SkillMatcher, load_taxonomy  # noqa: E402
+
+CORPUS = json.loads((ROOT / "benchmarks" / "data" / "sample_resumes.json").read_text())
+# Text budget of the resume parser ([resume_parser] max_chars)
+MAX_CHARS = 40000
+
+
+def build_regex_baseline(taxonomy):
+    """The obvious alternative: a whole-word regex per phrase, each scanning the full text"""
+    patterns = []
+    for canonical, phrases in taxonomy.items():
+        for phrase in phrases:
+            words = [re.escape(word) for word in re.findall(r"[a-z0-9#+.]+", phrase.lower())]
+            patterns.append((canonical, re.compile(r"(?<![\w.])" + r"[\W_]+".join(words) + r"(?![\w+#])")))
+    return patterns
+
+
+def regex_skills(patterns, text):
+    text = text.lower()
+    return {canonical for canonical, pattern in patterns if pattern.search(text)}
+
+
+def build_cases():
+    cases = dict(CORPUS)
+    everything = "\n\n".join(CORPUS.values())
+    # Worst case: the full character budget of resume text
+    cases["max_chars_budget"] = (everything * (MAX_CHARS // len(everything) + 1))[:MAX_CHARS]
+    return cases
+
+
+def _time_ms(func):
+    number, total = timeit.Timer(func).autorange()
+    return total / number * 1000
+
+
+def main():
+    taxonomy = load_taxonomy()
+    started = time.perf_counter()
+    matcher = SkillMatcher(taxonomy)
+    build_ms = (time.perf_counter() - started) * 1000
+    patterns = build_regex_baseline(taxonomy)
+    phrases = sum(len(p) for p in taxonomy.values())
+    print(f"taxonomy: {len(taxonomy)} skills, {phrases} phrases; automaton built in {build_ms:.1f} ms\n")
+
+    print(f"{'case':<20} {'chars':>7} {'skills':>7} {'confident':>10} {'matcher ms':>11} {'regex ms':>9}")
+    for name, text in build_cases().items():
+        extracted = matcher.extract(text)
+        matcher_ms = _time_ms(lambda: matcher.extract(text))
+        regex_ms = _time_ms(lambda: regex_skills(patterns, text))
+        print(
+            f"{name:<20} {len(text):>7} {len(extracted['skills']):>7} {str(extracted['confident']):>10}"
+            f" {matcher_ms:>11.3f} {regex_ms:>9.3f}"
+        )
+
+    print()
+    for name, text in CORPUS.items():
+        print(f"{name}: {', '.join(matcher.extract(text)['skills'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Startup benchmark: import cost of the app's modules and time-to-first-render of app.py
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+Run from the project root:
+    python benchmarks/bench_startup.py
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What the pages import before rendering anything (besides streamlit): the
+# union of the top-level imports of pages/*.py
+PAGE_IMPORTS = (
+    "import config_loader, llm, utils, utils.resume_cache, utils.resume_parser, utils.skill_matcher, "
+    "utils.style_builder, memory.repository, services.phase_progress, services.progress_stats"
+)
+
+FIRST_RENDER = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(f"app.py raised: {at.exception}")
+print(f"{elapsed:.3f}")
+"""
+
+HEAVY_PACKAGES = ("openai", "azure", "pypdf", "httpx", "dotenv")
+
+
+def run_python(args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+
+
+def import_times(statement):
+    """
+    Parse `python -X importtime` output into ({module: cumulative us}, {top-level module: cumulative us})
+    """
+    result = run_python(["-X", "importtime", "-c", statement])
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+    times = {}
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        name = module.strip()
+        times[name] = int(cumulative_us)
+        # Nesting is shown by indentation; one leading space means imported directly
+        if len(module) - len(module.lstrip()) == 1:
+            top_level[name] = int(cumulative_us)
+    return times, top_level
+
+
+def main(top=10):
+    times, top_level = import_times(PAGE_IMPORTS)
+    print(f"Page imports: {PAGE_IMPORTS}")
+    print(f"  total import time: {sum(top_level.values()) / 1000:.1f} ms")
+    for package in HEAVY_PACKAGES:
+        loaded = package in times or any(name.startswith(package + ".") for name in times)
+        print(f"  {package:<8} imported at startup: {'yes' if loaded else 'no'}")
+    print("  slowest top-level imports:")
+    for name, us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"    {name:<40} {us / 1000:8.1f} ms")
+
+    result = run_python(["-c", FIRST_RENDER])
+    if result.returncode != 0:
+        print(f"Time to first render of app.py: failed\n{result.stderr[-2000:]}")
+    else:
+        print(f"Time to first render of app.py (interpreter start excluded): {result.stdout.strip()} s")
+
+
+if __name__ == "__main__":
+    main()
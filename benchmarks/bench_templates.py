@@ -0,0 +1,121 @@
+"""Micro-benchmark: rendering a 50-role result page with the compiled templates
+and class-based badges vs. the old escape/replace/format path with inline styles
+
+Run from the project root:
+    python benchmarks/bench_templates.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config_loader import load_config  # noqa: E402
+from utils import style_builder  # noqa: E402
+from utils.style_builder import (  # noqa: E402
+    build_css_from_config,
+    format_html_template,
+    render_skill_badges,
+)
+
+ROLE_COUNT = 50
+
+
+def legacy_build_css():
+    """build_css_from_config before templates were compiled"""
+    config = load_config()
+    css_template = config.get("css", {}).get("global", "")
+    if not css_template:
+        return ""
+    format_map = style_builder._css_format_map(config)
+    escaped = css_template.replace("{", "{{").replace("}", "}}")
+    for key in format_map.keys():
+        escaped = escaped.replace("{{" + key + "}}", "{" + key + "}")
+    return escaped.format(**format_map)
+
+
+def legacy_format_html_template(template_name, **kwargs):
+    """format_html_template before templates were compiled"""
+    config = load_config()
+    template = config.get("html", {}).get(template_name, "")
+    if not template:
+        return ""
+    format_params = style_builder._html_format_params(config)
+    format_params.update(kwargs)
+    escaped = template.replace("{", "{{").replace("}", "}}")
+    for key in format_params.keys():
+        escaped = escaped.replace("{{" + key + "}}", "{" + key + "}")
+    return escaped.format(**format_params)
+
+
+def legacy_render_skill_badges(skills, missing=False):
+    """render_skill_badges before badges became class-based (one inline style per badge)"""
+    config = load_config()
+    colors = config.get("ui", {}).get("colors", {})
+    badge = config.get("ui", {}).get("skills_badge", {})
+    if missing:
+        bg_color, border_color, text_color = "#FEF3C7", colors.get("warning", "#F59E0B"), "#92400E"
+    else:
+        bg_color = badge.get("background_color", "#EFF6FF")
+        border_color = badge.get("border_color", "#0EA5E9")
+        text_color = colors.get("primary", "#1E3A8A")
+    badges_html = ""
+    for skill in skills:
+        badges_html += f"""<span style='display: inline-block; background-color: {bg_color}; border: 1px solid {border_color}; color: {text_color}; padding: {badge.get("padding", 10)}px {badge.get("padding", 10) * 1.5}px; border-radius: {badge.get("border_radius", 6)}px; font-size: {badge.get("font_size", 13)}px; font-weight: 500; margin: 4px;'>{skill}</span>"""
+    return badges_html
+
+
+def build_roles():
+    return [
+        {
+            "role": f"Role {idx}",
+            "required_skills": [f"Skill {idx}-{n}" for n in range(8)],
+            "missing_skills": [f"Gap {idx}-{n}" for n in range(4)],
+        }
+        for idx in range(ROLE_COUNT)
+    ]
+
+
+def render_page(roles, css, template, badges):
+    """Everything home.py formats for one rerun of a results page"""
+    parts = [
+        css(),
+        template("roles_section", header="Recommended Roles"),
+        template("success_box", message="Skills ready"),
+    ]
+    for role in roles:
+        parts.append(template("role_header_gradient", title=role["role"], role=role["role"]))
+        parts.append(badges(role["required_skills"], missing=False))
+        parts.append(badges(role["missing_skills"], missing=True))
+    return "".join(parts)
+
+
+def _time_us(func):
+    number, total = timeit.Timer(func).autorange()
+    return total / number * 1e6
+
+
+def main():
+    roles = build_roles()
+    legacy = lambda: render_page(roles, legacy_build_css, legacy_format_html_template, legacy_render_skill_badges)  # noqa: E731
+    compiled = lambda: render_page(roles, build_css_from_config, format_html_template, render_skill_badges)  # noqa: E731
+
+    if legacy_build_css() != build_css_from_config():
+        raise SystemExit("compiled stylesheet differs from the legacy path")
+    for name in load_config().get("html", {}):
+        if legacy_format_html_template(name, header="H", message="M") != format_html_template(name, header="H", message="M"):
+            raise SystemExit(f"compiled template '{name}' differs from the legacy path")
+
+    legacy_us = _time_us(legacy)
+    compiled_us = _time_us(compiled)
+    # The stylesheet is the first part of both pages; with static serving apply_styles() sends a reference instead
+    css_chars = len(build_css_from_config())
+    print(f"{ROLE_COUNT}-role results page")
+    print(f"  legacy   {legacy_us:10.1f} us  {len(legacy()) - css_chars:8} chars + {css_chars} chars of CSS per rerun")
+    print(f"  compiled {compiled_us:10.1f} us  {len(compiled()) - css_chars:8} chars ({legacy_us / compiled_us:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,86 @@
 from pathlib import Path
+from types import MappingProxyType
+import threading
+import time
 import tomli
 import logging
 
 logger = logging.getLogger(__name__)
 
+CONFIG_PATH = Path(__file__).parent / "config.toml"
+# How long a parsed config is trusted before the file's mtime is checked again
+MTIME_CHECK_INTERVAL = 1.0
+
+_config_lock = threading.Lock()
+_cached_config = None
+_cached_signature = None
+_last_checked = 0.0
+_config_stats = {"parses": 0, "hits": 0}
+
+
+def _freeze(value):
+    """Recursively convert parsed TOML into read-only mappings and tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 
 def load_config():
-    config_path = Path(__file__).parent / "config.toml"
-    logger.debug(f"Loading config from {config_path}")
+    """
+    Return config.toml as an immutable view. The file is parsed once and only
+    re-parsed when its mtime/size changes, so edits still hot-reload.
+    """
+    global _cached_config, _cached_signature, _last_checked
 
-    if not config_path.exists():
-        logger.exception("config.toml not found at project root")
-        raise FileNotFoundError("config.toml not found at project root")
+    now = time.monotonic()
+    with _config_lock:
+        if _cached_config is not None and now - _last_checked < MTIME_CHECK_INTERVAL:
+            _config_stats["hits"] += 1
+            return _cached_config
 
-    with open(config_path, "rb") as f:
-        conf = tomli.load(f)
+        if not CONFIG_PATH.exists():
+            logger.exception("config.toml not found at project root")
+            raise FileNotFoundError("config.toml not found at project root")
+
+        stat = CONFIG_PATH.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        _last_checked = now
+        if _cached_config is not None and signature == _cached_signature:
+            _config_stats["hits"] += 1
+            return _cached_config
+
+        logger.debug(f"Loading config from {CONFIG_PATH}")
+        with open(CONFIG_PATH, "rb") as f:
+            conf = _freeze(tomli.load(f))
+        _cached_config = conf
+        _cached_signature = signature
+        _config_stats["parses"] += 1
         logger.info("Configuration loaded successfully")
         return conf
+
+
+def resolve_path(path: str) -> str:
+    """A path from config.toml: relative paths are taken from the project root, not the working directory"""
+    if not path or path == ":memory:" or Path(path).is_absolute():
+        return path
+    return str(CONFIG_PATH.parent / path)
+
+
+def get_config_stats():
+    """Return how many times config.toml was parsed vs. served from cache"""
+    with _config_lock:
+        return dict(_config_stats)
+
+
+_env_loaded = False
+
+
+def load_env():
+    """Load `.env` into the process environment once, on first use"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
@@ -1,19 +1,30 @@
 import json
-import re
-from openai import AzureOpenAI
 import os
-from dotenv import load_dotenv
 from prompts import SKILL_EXTRACTION_PROMPT, NEXT_ROLE_WITH_LINKS_PROMPT
+from llm.json_utils import extract_json
 
-load_dotenv()
+_client = None
 
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_version="2024-02-01"
-)
 
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+def get_client():
+    """Load .env and create the Azure OpenAI client on first use rather than at import time."""
+    global _client
+    if _client is None:
+        from dotenv import load_dotenv
+        from openai import AzureOpenAI
+
+        load_dotenv()
+        _client = AzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_version="2024-02-01"
+        )
+    return _client
+
+
+def _deployment_name():
+    get_client()
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
 
 
 def extract_skills(resume_text):
@@ -22,8 +33,8 @@ def extract_skills(resume_text):
     Returns a comma-separated string.
     """
     prompt = SKILL_EXTRACTION_PROMPT + resume_text
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
+    response = get_client().chat.completions.create(
+        model=_deployment_name(),
         messages=[
             {"role": "system", "content": "You are an AI that extracts professional skills."},
             {"role": "user", "content": prompt}
@@ -42,8 +53,8 @@ def get_next_roles_with_links(skills_text, career_goal=None):
         prompt_input += f"\nUser's career interest: {career_goal}"
 
     prompt = NEXT_ROLE_WITH_LINKS_PROMPT.format(skills=prompt_input)
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
+    response = get_client().chat.completions.create(
+        model=_deployment_name(),
         messages=[
             {"role": "system", "content": "You are a career advisor."},
             {"role": "user", "content": prompt}
@@ -57,13 +68,8 @@ def get_next_roles_with_links(skills_text, career_goal=None):
     try:
         result = json.loads(raw_text)
     except json.JSONDecodeError:
-        match = re.search(r"(\{.*\})", raw_text, re.DOTALL)
-        if match:
-            try:
-                result = json.loads(match.group(1))
-            except:
-                return {"error": "Failed to parse AI response."}
-        else:
+        result = extract_json(raw_text)
+        if result is None:
             return {"error": "Failed to parse AI response."}
 
     return result
@@ -1,7 +1,10 @@
 import logging
 from .career_ai import create_career_agent
+from .async_runner import run_sync, gather_sync, submit
+from .json_utils import get_parse_stats
+from .compaction import compact_resume, get_compaction_stats
 
 logger = logging.getLogger(__name__)
 logger.debug("LLM package initialized")
 
-__all__ = ["create_career_agent"]
\ No newline at end of file
+__all__ = ["create_career_agent", "run_sync", "gather_sync", "submit", "get_parse_stats", "compact_resume", "get_compaction_stats"]
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Sync facade over a single background event loop for awaitable LLM calls"""
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """Start the shared event loop thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True)
+                thread.start()
+                _loop = loop
+                logger.info("Started shared LLM event loop thread")
+    return _loop
+
+
+def submit(coro):
+    """Schedule a coroutine on the shared loop without waiting; returns a concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run_sync(coro, timeout=None):
+    """
+    Run a coroutine on the shared loop and block until it finishes.
+    Safe to call from any Streamlit script thread; the loop (and the async
+    HTTP connection pool bound to it) is reused across calls.
+    """
+    return submit(coro).result(timeout)
+
+
+def gather_sync(*coros, timeout=None):
+    """
+    Run several coroutines concurrently on the shared loop and return their results in order.
+    Exceptions are returned in place of results rather than raised.
+    """
+    async def _gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    return run_sync(_gather(), timeout=timeout)
@@ -0,0 +1,211 @@
+"""Content-addressed response cache for LLM completions"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from resource_registry import get_resource
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(deployment: str, prompt: str, temperature: float) -> str:
+    """Hash deployment name, temperature and prompt into a stable cache key"""
+    digest = hashlib.sha256()
+    digest.update((deployment or "").encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(repr(float(temperature)).encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MemoryCacheTier:
+    """In-process LRU tier with TTL and entry-count eviction"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """Optional on-disk tier so cached responses survive restarts"""
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        logger.info("SQLite response cache opened at %s", path)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    """Two-tier (memory, optional SQLite) cache for raw LLM responses"""
+
+    def __init__(self, memory_tier: MemoryCacheTier, disk_tier: Optional[SQLiteCacheTier] = None):
+        self.memory = memory_tier
+        self.disk = disk_tier
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("hits", "memory_hits")
+            return value
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.error(f"SQLite response cache read failed: {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("hits", "disk_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as e:
+                logger.error(f"SQLite response cache write failed: {e}")
+        self._count("stores")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict:
+        """Return a snapshot of hit/miss counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._stats[name] += 1
+
+
+def build_response_cache(settings: Dict) -> Optional[ResponseCache]:
+    """Build a ResponseCache from the `[llm_cache]` config section"""
+    if not settings.get("enabled", True):
+        logger.info("LLM response cache disabled by configuration")
+        return None
+
+    ttl_seconds = settings.get("ttl_seconds", 3600)
+    memory_tier = MemoryCacheTier(
+        max_entries=settings.get("max_entries", 512),
+        ttl_seconds=ttl_seconds
+    )
+
+    disk_tier = None
+    sqlite_path = settings.get("sqlite_path", "")
+    if sqlite_path:
+        try:
+            disk_tier = SQLiteCacheTier(
+                sqlite_path,
+                max_entries=settings.get("sqlite_max_entries", 10000),
+                ttl_seconds=settings.get("sqlite_ttl_seconds", ttl_seconds)
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to open SQLite response cache at {sqlite_path}: {e}")
+
+    return ResponseCache(memory_tier, disk_tier)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache (None when disabled), creating it on first use"""
+    from config_loader import load_config
+    return get_resource("llm_response_cache", lambda: build_response_cache(load_config().get("llm_cache", {})))
@@ -2,25 +2,60 @@
 
 import os
 import json
-import re
-import streamlit as st
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+import threading
+from config_loader import load_config, load_env
+from resource_registry import get_resource
 from .prompts import NEXT_ROLE_PROMPT, STUDY_PLAN_PROMPT, SKILL_EXTRACTION_PROMPT
+from .cache import get_response_cache, make_cache_key
+from .compaction import compact_resume
+from .json_stream import IncrementalArrayParser
+from .json_utils import extract_json, record_parse_event, repair_json
+from .schemas import ROLES_SCHEMA, SKILLS_SCHEMA, STUDY_PLAN_SCHEMA, validate
 
-# Load environment variables
-load_dotenv()
+API_VERSION = "2024-02-01"
 
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-AZURE_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
-AZURE_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 
-# Initialize Azure OpenAI client
-client = AzureOpenAI(
-    api_key=AZURE_API_KEY,
-    azure_endpoint=AZURE_ENDPOINT,
-    api_version="2024-02-01"
-)
+def _deployment_name():
+    load_env()
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+
+def _azure_client_settings():
+    # Environment (.env) and the openai SDK are only loaded when a client is first needed
+    load_env()
+    return {
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "azure_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
+        "api_version": API_VERSION,
+    }
+
+
+def get_openai_client():
+    """
+    Shared blocking Azure OpenAI client; one instance (and HTTP keep-alive pool) per process
+    """
+    def build():
+        from openai import AzureOpenAI
+        return AzureOpenAI(**_azure_client_settings())
+
+    return get_resource("azure_openai_client", build)
+
+
+def get_async_openai_client():
+    """
+    Shared asyncio Azure OpenAI client, used from the llm.async_runner event loop
+    """
+    def build():
+        from openai import AsyncAzureOpenAI
+        return AsyncAzureOpenAI(**_azure_client_settings())
+
+    return get_resource("azure_openai_async_client", build)
+
+
+STRICT_JSON_INSTRUCTION = "\n\nIMPORTANT: Reply with valid JSON only (no surrounding text) matching the requested schema exactly."
+
+# JSON mode: the model must emit a single JSON object, so fences and prose are rare
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
 
 import logging
 logger = logging.getLogger(__name__)
@@ -31,70 +66,192 @@ class LLMClient:
     LLM Client for making real calls to Azure OpenAI
     """
 
-    def complete(self, prompt):
+    def __init__(self, cache=None):
+        # Optional ResponseCache shared across sessions; identical prompts skip the model call
+        self.cache = cache
+        # One client serves every session, so per-request debug state is kept per thread
+        self._local = threading.local()
+
+    @property
+    def last_raw_response(self):
+        return getattr(self._local, "last_raw_response", None)
+
+    @last_raw_response.setter
+    def last_raw_response(self, value):
+        self._local.last_raw_response = value
+
+    def complete(self, prompt, temperature=0.4, use_cache=True, schema=None):
         """
-        Calls the real LLM and returns parsed JSON
+        Calls the real LLM (or the response cache) and returns parsed JSON.
+        With `use_cache=False` the cached answer is skipped and replaced by a fresh one.
+        `schema` (see llm/schemas.py) is validated locally and drives JSON repair.
         """
+        cache_key, raw_content = self._lookup(prompt, temperature, use_cache)
+        if raw_content is not None:
+            return self.parse_response(raw_content, schema)
+
         logger.debug("Sending prompt to LLM (len=%d)", len(prompt))
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        response = get_openai_client().chat.completions.create(
+            model=_deployment_name(),
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.4
+            temperature=temperature,
+            response_format=JSON_RESPONSE_FORMAT
         )
+        return self._handle_response(cache_key, response.choices[0].message.content, schema)
 
-        raw_content = response.choices[0].message.content.strip()
+    async def acomplete(self, prompt, temperature=0.4, use_cache=True, schema=None):
+        """
+        Awaitable variant of `complete` built on AsyncAzureOpenAI
+        """
+        cache_key, raw_content = self._lookup(prompt, temperature, use_cache)
+        if raw_content is not None:
+            return self.parse_response(raw_content, schema)
+
+        logger.debug("Sending prompt to LLM asynchronously (len=%d)", len(prompt))
+        response = await get_async_openai_client().chat.completions.create(
+            model=_deployment_name(),
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            response_format=JSON_RESPONSE_FORMAT
+        )
+        return self._handle_response(cache_key, response.choices[0].message.content, schema)
+
+    def stream_elements(self, prompt, key, temperature=0.4, use_cache=True, schema=None):
+        """
+        Stream a completion and yield each element of the `key` array (e.g. "roles")
+        as soon as it closes. Falls back to the full-response parser when nothing
+        could be parsed incrementally.
+        """
+        cache_key, raw_content = self._lookup(prompt, temperature, use_cache)
+        if raw_content is not None:
+            yield from self._elements(self.parse_response(raw_content, schema), key)
+            return
+
+        logger.debug("Streaming prompt to LLM (len=%d)", len(prompt))
+        stream = get_openai_client().chat.completions.create(
+            model=_deployment_name(),
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            response_format=JSON_RESPONSE_FORMAT,
+            stream=True
+        )
+
+        parser = IncrementalArrayParser(key)
+        chunks = []
+        for chunk in stream:
+            # Azure sends content-filter chunks without choices or deltas
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            chunks.append(delta)
+            for element in parser.feed(delta):
+                yield _without_nulls(element)
+
+        parsed = self._handle_response(cache_key, "".join(chunks), schema)
+        if parser.count == 0:
+            yield from self._elements(parsed, key)
+
+    @staticmethod
+    def _elements(result, key):
+        return [_without_nulls(element) for element in result.get(key, [])] if isinstance(result, dict) else []
+
+    def _lookup(self, prompt, temperature, use_cache):
+        """
+        Return (cache_key, cached raw response or None) for a prompt
+        """
+        cache_key = make_cache_key(_deployment_name(), prompt, temperature) if self.cache else None
+        raw_content = self.cache.get(cache_key) if self.cache and use_cache else None
+        if raw_content is not None:
+            logger.debug("LLM response cache hit (key=%s)", cache_key[:12])
+            self.last_raw_response = raw_content
+        return cache_key, raw_content
+
+    def _handle_response(self, cache_key, raw_content, schema=None):
+        """
+        Parse a raw completion and store usable answers in the response cache
+        """
+        raw_content = (raw_content or "").strip()
         self.last_raw_response = raw_content
         logger.debug("Received raw response from LLM (len=%d)", len(raw_content))
 
+        parsed = self.parse_response(raw_content, schema)
+        # Only cache answers we could use; a malformed response should be retried, not replayed
+        if self.cache and parsed and (schema is None or not validate(parsed, schema)):
+            self.cache.set(cache_key, raw_content)
+        return parsed
+
+    def parse_response(self, raw_content, schema=None):
+        """
+        Parse JSON out of a raw model response. When the heuristic extraction
+        fails (or does not match `schema`), the response is repaired locally
+        instead of re-prompting the model.
+        """
+        parsed, source = self._extract_json(raw_content)
+        if parsed is not None and (schema is None or not validate(parsed, schema)):
+            record_parse_event(source)
+            return parsed
+
+        # Local repair handles fenced, truncated and trailing-text JSON in-process
+        repaired = repair_json(raw_content)
+        if repaired is not None and (schema is None or not validate(repaired, schema)):
+            logger.info("Repaired malformed LLM JSON locally (len=%d)", len(raw_content))
+            record_parse_event("repaired")
+            return repaired
+
+        if parsed is not None:
+            logger.warning("LLM JSON does not match schema: %s", "; ".join(validate(parsed, schema)[:5]))
+            record_parse_event("invalid")
+            return parsed
+
+        # Last resort: log the raw response for debugging and return empty dict
+        logger.error("No parsable JSON found in LLM response. Raw content: %s", raw_content[:1000])
+        record_parse_event("failed")
+        return {}
+
+    def _extract_json(self, raw_content):
+        """
+        Return (parsed JSON or None, source): a direct parse, then one scan for embedded JSON
+        """
         # Attempt to parse JSON from response directly
         try:
             parsed = json.loads(raw_content)
             logger.debug("Parsed JSON response successfully")
-            return parsed
+            return parsed, "direct"
         except json.JSONDecodeError:
             logger.warning("LLM returned non-JSON response; attempting heuristic extraction")
 
-        # Try to extract JSON from fenced code blocks (```json ... ``` or ``` ... ```)
-        fence_match = re.search(r"```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```", raw_content, re.DOTALL | re.IGNORECASE)
-        if fence_match:
-            try:
-                parsed = json.loads(fence_match.group(1))
-                logger.debug("Parsed JSON from fenced code block")
-                return parsed
-            except json.JSONDecodeError:
-                logger.exception("Failed to parse JSON from fenced code block; continuing fallback")
-
-        # Try to find a JSON object {...} non-greedily
-        obj_match = re.search(r"\{.*?\}", raw_content, re.DOTALL)
-        if obj_match:
-            try:
-                parsed = json.loads(obj_match.group())
-                logger.debug("Parsed JSON from first JSON object in response")
-                return parsed
-            except json.JSONDecodeError:
-                logger.exception("Failed to parse JSON from first object; continuing fallback")
-
-        # Try to find a top-level JSON array [ ... ]
-        arr_match = re.search(r"\[.*?\]", raw_content, re.DOTALL)
-        if arr_match:
-            try:
-                parsed = json.loads(arr_match.group())
-                logger.debug("Parsed JSON array from response")
-                return parsed
-            except json.JSONDecodeError:
-                logger.exception("Failed to parse JSON array from response")
+        # Single bracket/string-aware pass over the text; handles fences and surrounding prose
+        parsed = extract_json(raw_content)
+        if parsed is not None:
+            logger.debug("Parsed JSON embedded in response")
+            return parsed, "fallback"
 
-        # Last resort: log the raw response for debugging and return empty dict
-        logger.error("No parsable JSON found in LLM response. Raw content: %s", raw_content[:1000])
-        return {}
+        return None, "failed"
+
+    @staticmethod
+    def _skill_extraction_prompt(resume_text):
+        """Skill extraction prompt over the resume compacted to [skill_extraction] max_resume_tokens"""
+        max_tokens = load_config().get("skill_extraction", {}).get("max_resume_tokens", 3000)
+        compacted, _ = compact_resume(resume_text or "", max_tokens=max_tokens)
+        return SKILL_EXTRACTION_PROMPT + compacted
 
     def extract_skills(self, resume_text):
         """
         Extract skills from resume text using LLM
         """
         logger.info("Extracting skills from resume text (chars=%d)", len(resume_text) if resume_text else 0)
-        prompt = SKILL_EXTRACTION_PROMPT + resume_text
-        result = self.complete(prompt)
+        prompt = self._skill_extraction_prompt(resume_text)
+        result = self.complete(prompt, schema=SKILLS_SCHEMA)
+        logger.debug("Skill extraction result: %s", str(result)[:200])
+        return result
+
+    async def aextract_skills(self, resume_text):
+        """
+        Awaitable variant of `extract_skills`
+        """
+        logger.info("Extracting skills from resume text asynchronously (chars=%d)", len(resume_text) if resume_text else 0)
+        prompt = self._skill_extraction_prompt(resume_text)
+        result = await self.acomplete(prompt, schema=SKILLS_SCHEMA)
         logger.debug("Skill extraction result: %s", str(result)[:200])
         return result
 
@@ -112,28 +269,80 @@ class CareerAgent:
         Returns next role suggestions as JSON. `skills` should be a list of skill strings.
         Accepts optional `experience_level` (student/entry/mid/senior) and `current_role` to provide more context to the model.
         """
+        prompt = self._profile_prompt(skills, career_goal, experience_level, current_role)
+        result = self.llm.complete(prompt, schema=ROLES_SCHEMA)
+
+        # Local repair already ran; re-prompt only if the answer is still unusable
+        if not self._has_roles(result):
+            logger.warning("LLM did not return 'roles' in first response; retrying with strict JSON instruction")
+            record_parse_event("reprompted")
+            result = self.llm.complete(prompt + STRICT_JSON_INSTRUCTION, schema=ROLES_SCHEMA)
+            self._check_roles(result)
+
+        return result
+
+    async def aanalyze_profile(self, skills, career_goal=None, experience_level=None, current_role=None):
+        """
+        Awaitable variant of `analyze_profile`
+        """
+        prompt = self._profile_prompt(skills, career_goal, experience_level, current_role)
+        result = await self.llm.acomplete(prompt, schema=ROLES_SCHEMA)
+
+        if not self._has_roles(result):
+            logger.warning("LLM did not return 'roles' in first response; retrying with strict JSON instruction")
+            record_parse_event("reprompted")
+            result = await self.llm.acomplete(prompt + STRICT_JSON_INSTRUCTION, schema=ROLES_SCHEMA)
+            self._check_roles(result)
+
+        return result
+
+    def stream_roles(self, skills, career_goal=None, experience_level=None, current_role=None):
+        """
+        Yield suggested roles one at a time as the model streams them.
+        Retries once with a strict JSON-only instruction, like `analyze_profile`.
+        """
+        prompt = self._profile_prompt(skills, career_goal, experience_level, current_role)
+        count = 0
+        for role in self.llm.stream_elements(prompt, "roles", schema=ROLES_SCHEMA):
+            count += 1
+            yield role
+
+        if not count:
+            logger.warning("LLM did not stream any roles; retrying with strict JSON instruction")
+            record_parse_event("reprompted")
+            for role in self.llm.stream_elements(prompt + STRICT_JSON_INSTRUCTION, "roles", schema=ROLES_SCHEMA):
+                count += 1
+                yield role
+            if not count:
+                logger.error("LLM failed to provide roles after retry. Raw response (truncated): %s", str(getattr(self.llm, 'last_raw_response', ''))[:1000])
+
+    def _profile_prompt(self, skills, career_goal, experience_level, current_role):
         skills_str = ", ".join(skills) if isinstance(skills, (list, tuple)) else str(skills)
-        prompt = NEXT_ROLE_PROMPT.format(
+        logger.debug("Analyzing profile with experience_level=%s current_role=%s", experience_level, current_role)
+        return NEXT_ROLE_PROMPT.format(
             skills=skills_str,
             career_goal=career_goal or "Not specified",
             experience_level=experience_level or "Not specified",
             current_role=current_role or "Not specified"
         )
 
-        logger.debug("Analyzing profile with experience_level=%s current_role=%s", experience_level, current_role)
-
-        result = self.llm.complete(prompt)
-
-        # If response didn't include roles, retry once with a strict JSON-only instruction
-        if not result or not isinstance(result, dict) or "roles" not in result:
-            logger.warning("LLM did not return 'roles' in first response; retrying with strict JSON instruction")
-            retry_prompt = prompt + "\n\nIMPORTANT: Reply with valid JSON only (no surrounding text) matching the requested schema exactly."
-            result = self.llm.complete(retry_prompt)
+    @staticmethod
+    def _has_roles(result):
+        """
+        Drop role entries without a name; True if any remain. Only a missing or
+        empty `roles` list warrants a re-prompt, not a null optional field.
+        """
+        roles = result.get("roles") if isinstance(result, dict) else None
+        if not isinstance(roles, list):
+            return False
+        result["roles"] = [
+            _without_nulls(role) for role in roles if isinstance(role, dict) and isinstance(role.get("role"), str)
+        ]
+        return bool(result["roles"])
 
-            if not result or not isinstance(result, dict) or "roles" not in result:
-                logger.error("LLM failed to provide roles after retry. Raw response (truncated): %s", str(getattr(self.llm, 'last_raw_response', ''))[:1000])
-
-        return result
+    def _check_roles(self, result):
+        if not self._has_roles(result):
+            logger.error("LLM failed to provide roles after retry. Raw response (truncated): %s", str(getattr(self.llm, 'last_raw_response', ''))[:1000])
 
     def decide_next_roles(self, analysis_result):
         """
@@ -141,26 +350,55 @@ class CareerAgent:
         """
         return analysis_result.get("roles", [])
 
-    def generate_study_plan(self, selected_role, current_skills=None):
+    def generate_study_plan(self, selected_role, current_skills=None, regenerate=False):
         """
         Generate a phase-wise study plan for a selected role, focusing on missing skills.
         `selected_role` is expected to be a dict with keys: "role", and optionally "missing_skills".
+        Pass `regenerate=True` to bypass the response cache and ask the model for a new plan.
+        """
+        prompt = self._study_plan_prompt(selected_role, current_skills)
+        return self.llm.complete(prompt, use_cache=not regenerate, schema=STUDY_PLAN_SCHEMA)
+
+    async def agenerate_study_plan(self, selected_role, current_skills=None, regenerate=False):
+        """
+        Awaitable variant of `generate_study_plan`
+        """
+        prompt = self._study_plan_prompt(selected_role, current_skills)
+        return await self.llm.acomplete(prompt, use_cache=not regenerate, schema=STUDY_PLAN_SCHEMA)
+
+    def stream_study_plan(self, selected_role, current_skills=None, regenerate=False):
         """
+        Yield study plan phases one at a time as the model streams them
+        """
+        prompt = self._study_plan_prompt(selected_role, current_skills)
+        yield from self.llm.stream_elements(prompt, "phases", use_cache=not regenerate, schema=STUDY_PLAN_SCHEMA)
+
+    def _study_plan_prompt(self, selected_role, current_skills):
         role_name = selected_role.get("role") if isinstance(selected_role, dict) else str(selected_role)
         missing = selected_role.get("missing_skills", []) if isinstance(selected_role, dict) else []
         current_skills = current_skills or []
 
-        prompt = STUDY_PLAN_PROMPT.format(
+        return STUDY_PLAN_PROMPT.format(
             role=role_name,
             current_skills=", ".join(current_skills),
             missing_skills=", ".join(missing)
         )
-        return self.llm.complete(prompt)
+
+
+def _without_nulls(element):
+    """Drop null fields from an array element so pages fall back to their defaults"""
+    if isinstance(element, dict):
+        return {key: value for key, value in element.items() if value is not None}
+    return element
 
 
 def create_career_agent():
     """
-    Factory method to initialize the career agent
+    Factory method returning the process-wide career agent
     """
-    llm_client = LLMClient()
+    return get_resource("career_agent", _build_career_agent)
+
+
+def _build_career_agent():
+    llm_client = LLMClient(cache=get_response_cache())
     return CareerAgent(llm_client)
@@ -0,0 +1,183 @@
+"""Resume compaction before skill extraction: whitespace, page furniture, duplicates and a token budget"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough OpenAI tokenizer ratio for English prose; only used to size the budget
+CHARS_PER_TOKEN = 4
+# Page separator in extracted text (see utils.resume_parser)
+PAGE_BREAK = "\f"
+# Lines this close to a page's top or bottom that recur there on at least half
+# the pages are headers/footers, and are dropped from those positions only.
+# Lines differing only in their digits ("Jane Doe - 2/3") count as recurring
+# once they appear on this many pages, so two date ranges are not mistaken for one
+FURNITURE_EDGE_LINES = 2
+FURNITURE_MIN_SHAPE_PAGES = 3
+
+_HORIZONTAL_SPACE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_DIGITS = re.compile(r"\d+")
+# "Page 3", "Page 3 of 5", "Page 3/5", "3 of 5": dropped wherever they are
+_PAGE_LABEL = re.compile(r"^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s+of\s+\d+)$", re.IGNORECASE)
+# "3", "- 3 -": dropped only as a page's first or last line; at most 3 digits, so years survive
+_BARE_PAGE_NUMBER = re.compile(r"^[-–\s]*\d{1,3}[-–\s]*$")
+
+# Section heading keywords, most valuable for skill extraction first
+SECTION_PRIORITY = (
+    ("skills", ("skill", "competenc", "technolog", "tools", "expertise", "proficienc")),
+    ("experience", ("experience", "employment", "work history", "career history", "professional background")),
+    ("projects", ("project", "portfolio")),
+    ("certifications", ("certific", "licens", "course", "training")),
+    ("summary", ("summary", "profile", "objective", "about")),
+    ("education", ("education", "academic", "qualification")),
+)
+# Paragraphs before any recognised heading (usually name/contact/summary)
+PREAMBLE = "summary"
+# Headings are short lines such as "Technical Skills" or "Work Experience:"
+HEADING_MAX_WORDS = 4
+
+_compaction_stats = Counter()
+_compaction_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def get_compaction_stats() -> Dict[str, int]:
+    """Totals over all compacted resumes: requests, tokens_before, tokens_after, tokens_saved"""
+    with _compaction_stats_lock:
+        return dict(_compaction_stats)
+
+
+def _normalize(text: str) -> List[List[str]]:
+    """Lines of each page with runs of horizontal whitespace collapsed"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return [
+        [_HORIZONTAL_SPACE.sub(" ", line).strip() for line in page.split("\n")]
+        for page in text.split(PAGE_BREAK)
+    ]
+
+
+def _shape(line: str) -> str:
+    return _DIGITS.sub("#", line.lower())
+
+
+def _drop_bare_page_numbers(lines: List[str]) -> List[str]:
+    """Blank out a bare number that is the first or last non-empty line of a page"""
+    content = [index for index, line in enumerate(lines) if line]
+    lines = list(lines)
+    for index in content[:1] + content[-1:]:
+        if _BARE_PAGE_NUMBER.match(lines[index]):
+            lines[index] = ""
+    return lines
+
+
+def _edge_indexes(lines: List[str]) -> List[int]:
+    """Indexes of the first and last FURNITURE_EDGE_LINES non-empty lines of a page"""
+    content = [index for index, line in enumerate(lines) if line]
+    return sorted(set(content[:FURNITURE_EDGE_LINES] + content[-FURNITURE_EDGE_LINES:]))
+
+
+def _strip_page_furniture(pages: List[List[str]]) -> List[str]:
+    """Drop page-number lines and headers/footers repeated across pages; returns all remaining lines"""
+    pages = [_drop_bare_page_numbers(lines) for lines in pages]
+    if len(pages) > 1:
+        on_pages, shapes_on_pages = Counter(), Counter()
+        for lines in pages:
+            edges = [lines[index] for index in _edge_indexes(lines)]
+            on_pages.update({line.lower() for line in edges})
+            shapes_on_pages.update({_shape(line) for line in edges})
+        threshold = max(2, (len(pages) + 1) // 2)
+        shape_threshold = max(FURNITURE_MIN_SHAPE_PAGES, threshold)
+
+        def is_furniture(line: str) -> bool:
+            return on_pages[line.lower()] >= threshold or shapes_on_pages[_shape(line)] >= shape_threshold
+
+        pages = [list(lines) for lines in pages]
+        for lines in pages:
+            for index in _edge_indexes(lines):
+                if is_furniture(lines[index]):
+                    lines[index] = ""
+    return [line for lines in pages for line in lines + [""] if not _PAGE_LABEL.match(line)]
+
+
+def _paragraphs(lines: List[str]) -> List[str]:
+    """Paragraphs (split at blank lines and section headings), each kept once"""
+    blocks = [[]]
+    for line in lines:
+        if not line or _section_of(line):
+            blocks.append([])
+        if line:
+            blocks[-1].append(line)
+    seen = set()
+    paragraphs = []
+    for block in blocks:
+        paragraph = "\n".join(block)
+        key = paragraph.lower()
+        if paragraph and key not in seen:
+            seen.add(key)
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def _section_of(paragraph: str) -> Optional[str]:
+    heading = paragraph.split("\n", 1)[0].lower().strip(" :#*-")
+    if not heading or len(heading.split()) > HEADING_MAX_WORDS or heading.endswith("."):
+        return None
+    for section, keywords in SECTION_PRIORITY:
+        if any(keyword in heading for keyword in keywords):
+            return section
+    return None
+
+
+def _fit_budget(paragraphs: List[str], max_tokens: int) -> List[str]:
+    """Keep the most valuable sections' paragraphs that fit `max_tokens`, in document order"""
+    rank = {section: index for index, (section, _) in enumerate(SECTION_PRIORITY)}
+    section = PREAMBLE
+    ranked = []
+    for position, paragraph in enumerate(paragraphs):
+        section = _section_of(paragraph) or section
+        ranked.append((rank.get(section, len(rank)), position, paragraph))
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    kept = []
+    for _, position, paragraph in sorted(ranked):
+        cost = len(paragraph) + 2
+        if cost <= budget:
+            kept.append((position, paragraph))
+            budget -= cost
+        elif not kept:
+            # Even the most valuable paragraph is over budget: keep its head
+            kept.append((position, paragraph[:budget]))
+            break
+    return [paragraph for _, paragraph in sorted(kept)]
+
+
+def compact_resume(text: str, max_tokens: int = 3000) -> Tuple[str, Dict[str, int]]:
+    """
+    Shrink resume text for the skill extraction prompt: normalize whitespace,
+    drop page numbers and repeated per-page lines, deduplicate paragraphs, then
+    keep skills/experience/projects/... sections first until `max_tokens`
+    (estimated) is reached. Returns (text, {"tokens_before", "tokens_after", "tokens_saved"}).
+    """
+    tokens_before = estimate_tokens(text or "")
+    paragraphs = _paragraphs(_strip_page_furniture(_normalize(text or "")))
+    compacted = "\n\n".join(paragraphs)
+    if max_tokens and estimate_tokens(compacted) > max_tokens:
+        compacted = "\n\n".join(_fit_budget(paragraphs, max_tokens))
+
+    stats = {"tokens_before": tokens_before, "tokens_after": estimate_tokens(compacted)}
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    with _compaction_stats_lock:
+        _compaction_stats["requests"] += 1
+        _compaction_stats.update(stats)
+    logger.info(
+        "Compacted resume for skill extraction: ~%d -> ~%d tokens (saved ~%d)",
+        stats["tokens_before"], stats["tokens_after"], stats["tokens_saved"],
+    )
+    return compacted, stats
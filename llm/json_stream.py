@@ -0,0 +1,93 @@
+"""Incremental JSON parsing for streamed LLM responses"""
+
+import json
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalArrayParser:
+    """
+    Yields each completed element of the top-level array under `key`
+    (e.g. "roles" or "phases") as soon as its closing bracket arrives.
+    Text outside the JSON object, such as markdown fences, is ignored.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars = []
+        self._last_key = None
+        self._array_depth = None
+        self._in_element = False
+        self._element_chars = []
+        self.done = False
+        self.count = 0
+
+    def feed(self, chunk: str) -> List:
+        """Consume a chunk of streamed text and return any elements completed by it"""
+        completed = []
+        if self.done or not chunk:
+            return completed
+
+        for char in chunk:
+            in_element = self._in_element
+            if in_element:
+                self._element_chars.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._stack[0] == "{" and self._array_depth is None:
+                        self._last_key = "".join(self._string_chars)
+                    if in_element and len(self._stack) == self._array_depth:
+                        self._emit(completed)
+                elif len(self._stack) == 1:
+                    self._string_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_chars = []
+                if self._array_depth is not None and len(self._stack) == self._array_depth and not in_element:
+                    self._start_element(char)
+            elif char in "{[":
+                if self._array_depth is not None and len(self._stack) == self._array_depth and not in_element:
+                    self._start_element(char)
+                self._stack.append(char)
+                if (char == "[" and self._array_depth is None and len(self._stack) == 2
+                        and self._stack[0] == "{" and self._last_key == self.key):
+                    self._array_depth = len(self._stack)
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if self._array_depth is not None:
+                    if in_element and len(self._stack) == self._array_depth:
+                        self._emit(completed)
+                    elif len(self._stack) < self._array_depth:
+                        self.done = True
+                        break
+
+        return completed
+
+    def _start_element(self, char):
+        self._in_element = True
+        self._element_chars = [char]
+
+    def _emit(self, completed):
+        fragment = "".join(self._element_chars)
+        self._in_element = False
+        self._element_chars = []
+        try:
+            completed.append(json.loads(fragment))
+            self.count += 1
+        except json.JSONDecodeError:
+            logger.warning("Skipping malformed streamed %s element (len=%d)", self.key, len(fragment))
@@ -0,0 +1,205 @@
+"""Single-pass JSON extraction, local repair of malformed LLM JSON and parse outcome counters"""
+
+import json
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CLOSERS = {"{": "}", "[": "]"}
+_MAX_REPAIR_ATTEMPTS = 32
+
+# A complete string literal (unrolled so each character is matched one way
+# only) or a bracket; strings are consumed whole so their brackets are ignored
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+# Candidate starts tried with the C decoder before falling back to the scanner
+_FAST_DECODE_ATTEMPTS = 4
+_decoder = json.JSONDecoder()
+
+_parse_stats = Counter()
+_parse_stats_lock = threading.Lock()
+
+
+def record_parse_event(name: str) -> None:
+    """Count a parse outcome (e.g. "direct", "repaired", "reprompted", "failed")"""
+    with _parse_stats_lock:
+        _parse_stats[name] += 1
+
+
+def get_parse_stats() -> Dict[str, int]:
+    """Return how often responses parsed directly, needed local repair or a re-prompt"""
+    with _parse_stats_lock:
+        return dict(_parse_stats)
+
+
+def find_json_span(text: str, openers: str = "{[", pos: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Locate the outermost balanced JSON object/array at or after `pos` that
+    starts with one of `openers`, in a single left-to-right pass. Openers are
+    found with str.find and the brackets after them by one regex iterator
+    that skips whole string literals, so brackets inside strings are ignored
+    and the work stays linear in len(text).
+
+    The first value that closes at the top level wins. If the text never
+    balances (e.g. stray "{ [" before the payload), the shallowest balanced
+    value seen is returned instead. Returns (start, end) slice bounds, or None.
+    """
+    best = None
+    while True:
+        found = [index for index in (text.find(opener, pos) for opener in openers) if index != -1]
+        if not found:
+            break
+        stack = []
+        starts = []
+        pos = None
+        for token in _TOKEN.finditer(text, min(found)):
+            char = token.group()
+            if char in _CLOSERS:
+                stack.append(char)
+                starts.append(token.start())
+                continue
+            if char[0] == '"':
+                continue
+            opener = stack.pop()
+            start = starts.pop()
+            if _CLOSERS[opener] != char:
+                # Not JSON after all (e.g. "[see below}"); look for the next opener
+                pos = token.end()
+                break
+            if not stack:
+                return start, token.end()
+            if opener in openers and (best is None or len(stack) < best[0]):
+                best = (len(stack), start, token.end())
+        if pos is None:
+            break
+
+    return (best[1], best[2]) if best else None
+
+
+def _decode_first(text: str, opener: str) -> Optional[object]:
+    """C-speed fast path: decode at the first few `opener` positions (None if none decodes)"""
+    pos = text.find(opener)
+    for _ in range(_FAST_DECODE_ATTEMPTS):
+        if pos == -1:
+            break
+        try:
+            return _decoder.raw_decode(text, pos)[0]
+        except json.JSONDecodeError:
+            pos = text.find(opener, pos + 1)
+    return None
+
+
+def extract_json(text: str) -> Optional[object]:
+    """
+    Decode the outermost JSON value embedded in `text` (prose, fences, etc.).
+    Objects are preferred over arrays. The body of a ``` fence and the first
+    few bracket positions are tried directly with the C decoder; only when
+    those fail does the bracket scanner run. It hands the decoder one slice
+    at a time, and a balanced but invalid candidate (e.g. "{braces}" in prose)
+    makes the scan continue after it rather than start over.
+    """
+    body = strip_code_fences(text) if "```" in text else None
+    for openers in ("{", "["):
+        for candidate in (body, text):
+            if candidate is not None:
+                value = _decode_first(candidate, openers)
+                if value is not None:
+                    return value
+
+    for openers in ("{", "["):
+        pos = 0
+        while True:
+            span = find_json_span(text, openers, pos)
+            if span is None:
+                break
+            try:
+                return json.loads(text[span[0]:span[1]])
+            except json.JSONDecodeError:
+                pos = span[1]
+    return None
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the body of the first ``` fenced block, or the text unchanged"""
+    start = text.find("```")
+    if start == -1:
+        return text
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return text[start + 3:]
+    end = text.find("```", body_start)
+    return text[body_start + 1:end] if end != -1 else text[body_start + 1:]
+
+
+def repair_json(text: str) -> Optional[object]:
+    """
+    Cheaply repair fenced, truncated or trailing-text JSON without another model call.
+    Closes an unterminated string and any open brackets; if that is not enough,
+    backs off to the last complete element and closes from there.
+    Returns the decoded value, or None when nothing usable is found.
+    """
+    if not text:
+        return None
+    body = strip_code_fences(text)
+
+    starts = [idx for idx in (body.find("{"), body.find("[")) if idx != -1]
+    if not starts:
+        return None
+    body = body[min(starts):]
+
+    stack = []
+    in_string = False
+    escape = False
+    # (cut position, open brackets at that position) after each complete element
+    cut_points = []
+    end = len(body)
+
+    for idx, char in enumerate(body):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if not stack or _CLOSERS[stack[-1]] != char:
+                end = idx
+                break
+            stack.pop()
+            if not stack:
+                end = idx + 1
+                break
+            cut_points.append((idx + 1, tuple(stack)))
+        elif char == ",":
+            cut_points.append((idx, tuple(stack)))
+
+    candidates = []
+    head = body[:end]
+    if in_string:
+        head += '"'
+    candidates.append(head.rstrip().rstrip(",") + _close(stack))
+    for cut, open_brackets in reversed(cut_points[-_MAX_REPAIR_ATTEMPTS:]):
+        candidates.append(body[:cut].rstrip().rstrip(",") + _close(open_brackets))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+
+    logger.debug("Local JSON repair failed after %d attempts", len(candidates))
+    return None
+
+
+def _close(open_brackets) -> str:
+    return "".join(_CLOSERS[char] for char in reversed(open_brackets))
@@ -0,0 +1,105 @@
+"""Output schemas for each prompt and a small local validator"""
+
+from typing import Dict, List
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+# Optional fields the model often answers with null (dropped before elements reach the pages)
+_OPTIONAL_STRING = {"type": ["string", "null"]}
+_OPTIONAL_STRING_LIST = {"type": ["array", "null"], "items": {"type": "string"}}
+
+SKILLS_SCHEMA = {
+    "type": "object",
+    "required": ["skills"],
+    "properties": {
+        "skills": _STRING_LIST,
+        "current_role": _OPTIONAL_STRING,
+        "experience_level": _OPTIONAL_STRING,
+    },
+}
+
+ROLES_SCHEMA = {
+    "type": "object",
+    "required": ["roles"],
+    "properties": {
+        "roles": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["role"],
+                "properties": {
+                    "role": {"type": "string"},
+                    "summary": _OPTIONAL_STRING,
+                    "required_skills": _OPTIONAL_STRING_LIST,
+                    "missing_skills": _OPTIONAL_STRING_LIST,
+                    "explanation": _OPTIONAL_STRING,
+                },
+            },
+        },
+    },
+}
+
+STUDY_PLAN_SCHEMA = {
+    "type": "object",
+    "required": ["phases"],
+    "properties": {
+        "phases": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["phase"],
+                "properties": {
+                    "phase": {"type": "string"},
+                    "duration": _OPTIONAL_STRING,
+                    "focus": _OPTIONAL_STRING_LIST,
+                    "skills_targeted": _OPTIONAL_STRING_LIST,
+                    "deliverable": _OPTIONAL_STRING,
+                },
+            },
+        },
+    },
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def validate(data, schema: Dict, path: str = "$") -> List[str]:
+    """
+    Validate `data` against a JSON-Schema subset (type, required, properties,
+    items, minItems). Returns a list of error messages; empty means valid.
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected:
+        names = expected if isinstance(expected, list) else [expected]
+        if not any(isinstance(data, _TYPES[name]) and not (name in ("number", "integer") and isinstance(data, bool))
+                   for name in names):
+            return [f"{path}: expected {'/'.join(names)}, got {type(data).__name__}"]
+
+    if isinstance(data, dict):
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}: missing required key '{key}'")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in data:
+                errors.extend(validate(data[key], subschema, f"{path}.{key}"))
+
+    if isinstance(data, list):
+        min_items = schema.get("minItems")
+        if min_items is not None and len(data) < min_items:
+            errors.append(f"{path}: expected at least {min_items} items, got {len(data)}")
+        item_schema = schema.get("items")
+        if item_schema:
+            for idx, item in enumerate(data):
+                errors.extend(validate(item, item_schema, f"{path}[{idx}]"))
+
+    return errors
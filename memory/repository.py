@@ -1,17 +1,220 @@
+import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config_loader import load_config
+from resource_registry import get_resource
+from services.progress_tracker import ProgressTracker, get_progress_tracker
 
 logger = logging.getLogger(__name__)
 
-# Placeholder for tracking user progress in future persistence layer
-class ProgressRepository:
+
+class _UserEntry:
+    """Cached reads of one user: (operation, arguments) -> (expires_at, size, value)"""
+
+    __slots__ = ("values", "size")
+
     def __init__(self):
-        self.data = {}
+        self.values = {}
+        self.size = 0
+
+
+class ProgressRepository:
+    """
+    Bounded, thread-safe cache in front of a progress tracker. Reads are
+    read-through: results are kept per user for `ttl_seconds`, least recently
+    used users are evicted beyond `max_users` entries or `max_bytes` of
+    (approximate, JSON-encoded) cached data. Writes are write-through: they go
+    straight to the tracker and drop that user's cached reads. Trackers that
+    store writes later (write-behind) report each commit through
+    `add_write_listener`, which drops that user's cached reads again, so reads
+    taken between the save and the commit do not outlive it.
+    """
+
+    def __init__(
+        self,
+        tracker: ProgressTracker,
+        ttl_seconds: float = 60.0,
+        max_users: int = 500,
+        max_bytes: int = 8_000_000,
+    ):
+        self.tracker = tracker
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self._users = OrderedDict()
+        self._bytes = 0
+        # Bumped by every invalidation; a load that raced one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        add_write_listener = getattr(tracker, "add_write_listener", None)
+        if add_write_listener is not None:
+            add_write_listener(self.invalidate)
         logger.debug("Initialized ProgressRepository")
 
-    def save_progress(self, user_id, role_info, completed_weeks):
-        logger.info("Saving progress for user %s: role=%s, completed_weeks=%s", user_id, role_info, completed_weeks)
-        self.data[user_id] = {"role": role_info, "completed_weeks": completed_weeks}
+    # Read-through
+
+    def get_progress_snapshot(self, user_id: str, recent: int = 10) -> Dict:
+        return self._read(user_id, ("snapshot", recent), lambda: self.tracker.get_progress_snapshot(user_id, recent=recent))
+
+    def get_user_stats(self, user_id: str) -> Dict:
+        return self._read(user_id, ("stats",), lambda: self.tracker.get_user_stats(user_id))
+
+    def get_phase_states(self, user_id: str, role_name: str) -> Dict[int, Dict]:
+        return self._read(user_id, ("phase_states", role_name), lambda: self.tracker.get_phase_states(user_id, role_name))
+
+    def get_user_progress_page(
+        self,
+        user_id: str,
+        page_size: int = 10,
+        continuation_token: Optional[Any] = None,
+        select: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict], Optional[Any]]:
+        select = tuple(select) if select else None
+        return self._read(
+            user_id,
+            ("page", page_size, json.dumps(continuation_token, sort_keys=True), select),
+            lambda: self.tracker.get_user_progress_page(user_id, page_size, continuation_token, select),
+        )
+
+    def get_user_progress_history(
+        self, user_id: str, limit: int = 50, select: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        select = tuple(select) if select else None
+        return self._read(
+            user_id, ("history", limit, select), lambda: self.tracker.get_user_progress_history(user_id, limit, select)
+        )
+
+    # Write-through
+
+    def save_user_session(self, user_id: str, session_data: Dict) -> bool:
+        return self._write(user_id, self.tracker.save_user_session(user_id, session_data))
+
+    def save_role_selection(self, user_id: str, role: Dict) -> bool:
+        return self._write(user_id, self.tracker.save_role_selection(user_id, role))
+
+    def save_phase_progress(self, user_id: str, role_name: str, phase_number: int, progress: Dict) -> bool:
+        return self._write(user_id, self.tracker.save_phase_progress(user_id, role_name, phase_number, progress))
+
+    def save_phases(self, user_id: str, role_name: str, phases: Dict[int, Dict]) -> bool:
+        return self._write(user_id, self.tracker.save_phases(user_id, role_name, phases))
+
+    def save_skill_milestone(self, user_id: str, skill: str, milestone_data: Dict) -> bool:
+        return self._write(user_id, self.tracker.save_skill_milestone(user_id, skill, milestone_data))
+
+    def rebuild_user_summary(self, user_id: str) -> Dict:
+        return self._write(user_id, self.tracker.rebuild_user_summary(user_id))
+
+    # Pass-through
+
+    def is_available(self) -> bool:
+        return self.tracker.is_available()
+
+    def list_user_ids(self) -> List[str]:
+        return self.tracker.list_user_ids()
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop the cached reads of `user_id` (of every user when None)"""
+        with self._lock:
+            self._generation += 1
+            for key in [user_id] if user_id is not None else list(self._users):
+                entry = self._users.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry.size
+
+    def metrics(self) -> Dict:
+        """Hit/miss counters and current cache size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "users": len(self._users),
+                "bytes": self._bytes,
+            }
+
+    def _read(self, user_id: str, key: Tuple, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            cached = entry.values.get(key) if entry else None
+            if cached is not None and cached[0] > now:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+            generation = self._generation
+
+        # Loaded outside the lock so one slow backend call doesn't block other users
+        value = load()
+        if not _cacheable(value):
+            return value
+        size = len(json.dumps(value, default=_json_default))
+
+        with self._lock:
+            if generation != self._generation:
+                return value
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = _UserEntry()
+            previous = entry.values.get(key)
+            if previous is not None:
+                entry.size -= previous[1]
+                self._bytes -= previous[1]
+            entry.values[key] = (now + self.ttl_seconds, size, value)
+            entry.size += size
+            self._bytes += size
+            self._users.move_to_end(user_id)
+            self._evict()
+        return value
+
+    def _write(self, user_id: str, result):
+        # After the write, so reads that started before it are not cached either
+        self.invalidate(user_id)
+        return result
+
+    def _evict(self) -> None:
+        """Drop least recently used users until within bounds (caller holds the lock)"""
+        while self._users and (len(self._users) > self.max_users or self._bytes > self.max_bytes):
+            user_id, entry = self._users.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+            logger.debug(f"Evicted cached progress of user {user_id} ({entry.size} bytes)")
+
+
+def _json_default(value):
+    """Size estimates: encode mappings such as lazily decoded rows as dicts, anything else as text"""
+    return dict(value) if isinstance(value, Mapping) else str(value)
+
+
+def _cacheable(value) -> bool:
+    """Empty results (and snapshots without stats) may come from an unavailable or failing backend; don't pin them"""
+    if not value:
+        return False
+    if isinstance(value, tuple):
+        return bool(value[0])
+    if isinstance(value, dict) and "stats" in value:
+        return bool(value["stats"])
+    return True
+
 
-    def get_progress(self, user_id):
-        logger.debug("Retrieving progress for user %s", user_id)
-        return self.data.get(user_id, None)
+def get_progress_repository() -> ProgressRepository:
+    """Process-wide cache in front of the configured progress tracker"""
+    def build():
+        settings = load_config().get("progress", {})
+        return ProgressRepository(
+            get_progress_tracker(),
+            ttl_seconds=settings.get("cache_ttl_seconds", 60),
+            max_users=settings.get("cache_max_users", 500),
+            max_bytes=settings.get("cache_max_bytes", 8_000_000),
+        )
+    return get_resource("progress_repository", build)
@@ -1,15 +1,119 @@
 import logging
+import time
 import streamlit as st
 from config_loader import load_config
-from llm import create_career_agent
-from utils import extract_text_from_pdf
+from llm import create_career_agent, submit
+from utils import ResumeTooLargeError, extract_resume_text
+from utils.resume_cache import file_digest, get_resume_cache
+from utils.resume_parser import MB, check_upload_size
+from utils.skill_matcher import get_skill_matcher
 from utils.style_builder import apply_styles, render_skill_badges, format_html_template
-from services.table_storage_tracker import get_progress_tracker
+from memory.repository import get_progress_repository
 
 logger = logging.getLogger(__name__)
 
 config = load_config()
 
+
+def local_skills(resume_text):
+    """Provisional skills from the local taxonomy matcher, or None when it is disabled"""
+    settings = config.get("skill_extractor", {})
+    if not settings.get("enabled", True) or not resume_text:
+        return None
+    started = time.perf_counter()
+    extracted = get_skill_matcher().extract(resume_text, settings.get("min_confident_skills", 8))
+    logger.info(
+        "Local skill scan found %d skills in %.2f ms (confident=%s)",
+        len(extracted["skills"]), (time.perf_counter() - started) * 1000, extracted["confident"],
+    )
+    return extracted
+
+
+def _store_parsed(digest, parsed, share):
+    """Remember a parse in the session and, when enabled, the process-wide cache"""
+    cache_settings = config.get("resume_cache", {})
+    st.session_state.setdefault("resume_cache", {})[digest] = parsed
+    if share:
+        get_resume_cache(cache_settings.get("max_entries", 128)).set(digest, parsed)
+
+
+def _resolve_background(digest, parsed, share):
+    """Swap a provisional parse for the background LLM answer once it has arrived"""
+    future = st.session_state.get("resume_pending", {}).get(digest)
+    if future is None or not future.done():
+        return parsed
+    del st.session_state["resume_pending"][digest]
+    try:
+        extracted = future.result()
+    except Exception as e:
+        logger.warning("Background skill extraction failed; keeping the local skills: %s", e)
+        extracted = None
+    if isinstance(extracted, dict) and extracted.get("skills"):
+        parsed = {"text": parsed["text"], "extracted": extracted}
+        _store_parsed(digest, parsed, share)
+    else:
+        parsed = {**parsed, "provisional": False}
+        st.session_state["resume_cache"][digest] = parsed
+    return parsed
+
+
+def parse_resume(uploaded_file, agent):
+    """
+    Extract text and skills from an uploaded resume, at most once per file digest.
+    Results are memoized in the session and, when enabled, in a process-wide cache.
+    When the local skill scan is confident, its skills are returned right away and
+    the LLM either refines them in the background (result marked "provisional")
+    or is skipped, per [skill_extractor] when_confident.
+    """
+    cache_settings = config.get("resume_cache", {})
+    share = cache_settings.get("share_across_sessions", False)
+    session_cache = st.session_state.setdefault("resume_cache", {})
+
+    # Rejected before hashing or parsing anything
+    try:
+        check_upload_size(uploaded_file)
+    except ResumeTooLargeError as e:
+        st.warning(config["ui"]["resume_too_large_text"].format(size_mb=e.size / MB, limit_mb=e.limit / MB))
+        return {"text": "", "extracted": {}}
+
+    digest = file_digest(uploaded_file)
+    parsed = session_cache.get(digest)
+    if parsed is None and share:
+        parsed = get_resume_cache(cache_settings.get("max_entries", 128)).get(digest)
+    if parsed is not None:
+        logger.debug("Resume cache hit for digest %s", digest[:12])
+        session_cache[digest] = parsed
+        return _resolve_background(digest, parsed, share) if parsed.get("provisional") else parsed
+
+    with st.spinner(config["ui"]["extracting_skills_text"]):
+        resume_text = extract_resume_text(uploaded_file)
+    local = local_skills(resume_text)
+    when_confident = config.get("skill_extractor", {}).get("when_confident", "background")
+
+    if local and local["confident"] and when_confident == "background":
+        st.session_state.setdefault("resume_pending", {})[digest] = submit(agent.llm.aextract_skills(resume_text))
+        # Session only: other sessions should get the refined answer, not this one
+        parsed = session_cache[digest] = {"text": resume_text, "extracted": local, "provisional": True}
+        return parsed
+    if local and local["confident"] and when_confident == "skip":
+        extracted = local
+    else:
+        preview = st.empty()
+        if local and local["skills"]:
+            with preview.container():
+                st.caption(config["ui"]["provisional_skills_text"])
+                st.markdown(render_skill_badges(local["skills"], missing=False), unsafe_allow_html=True)
+        with st.spinner(config["ui"]["extracting_skills_text"]):
+            extracted = agent.llm.extract_skills(resume_text)
+        preview.empty()
+
+    parsed = {"text": resume_text, "extracted": extracted if isinstance(extracted, dict) else {}}
+    # Failed extractions are not cached so a later rerun can try again
+    if parsed["extracted"].get("skills"):
+        _store_parsed(digest, parsed, share)
+    return parsed
+
+
 def show_home():
     apply_styles()
     
@@ -28,7 +132,7 @@ def show_home():
     st.divider()
     
     agent = create_career_agent()
-    tracker = get_progress_tracker()
+    tracker = get_progress_repository()
 
     # Input section with professional cards
     st.markdown("### 📋 Assessment Details")
@@ -39,7 +143,7 @@ def show_home():
         st.markdown(format_html_template("input_label_template", label=config['ui']['resume_upload_label']), unsafe_allow_html=True)
         uploaded_file = st.file_uploader(
             label="",
-            type=["pdf","docx"],
+            type=["pdf", "docx", "txt"],
             label_visibility="collapsed",
             key="resume_uploader"
         )
@@ -63,24 +167,23 @@ def show_home():
 
     # Normalize skills into a list and persist in session state across reruns
     skills = st.session_state.get("skills", [])
+    current_role = st.session_state.get("current_role")
+    experience_level = st.session_state.get("experience_level")
 
+    provisional = False
     if uploaded_file:
-        with st.spinner(config["ui"]["extracting_skills_text"]):
-            resume_text = extract_text_from_pdf(uploaded_file)
-            extracted = agent.llm.extract_skills(resume_text)
-           # if isinstance(extracted, list):
-            #    st.write("inhereited list:", extracted)  # Debug line
-             #   skills = extracted["skills"]
-              #  current_role = extracted["current_role", ""]
-               # experience_level = extracted["experience_level", ""]
-            #elif isinstance(extracted["skills"], str) and extracted:
-            skills = extracted["skills"]#[s.strip() for s in extracted["skills"].split(",") if s.strip()]
-            current_role = extracted["current_role"]
-            experience_level = extracted["experience_level"]
-            logger.info("Skills extracted from uploaded resume: %s", skills)
-            # update persisted skills immediately
-            if skills:
-                st.session_state["skills"] = skills
+        parsed = parse_resume(uploaded_file, agent)
+        extracted = parsed["extracted"]
+        provisional = parsed.get("provisional", False)
+        skills = extracted.get("skills", [])
+        current_role = extracted.get("current_role")
+        experience_level = extracted.get("experience_level")
+        logger.info("Skills extracted from uploaded resume: %s", skills)
+        # update persisted skills immediately
+        if skills:
+            st.session_state["skills"] = skills
+            st.session_state["current_role"] = current_role
+            st.session_state["experience_level"] = experience_level
 
     if manual_skills:
         manual_list = [s.strip() for s in manual_skills.split(",") if s.strip()]
@@ -94,6 +197,19 @@ def show_home():
         st.markdown("**Your Skills:**")
         skills_html = render_skill_badges(skills, missing=False)
         st.markdown(f"<div style='margin: 15px 0;'>{skills_html}</div>", unsafe_allow_html=True)
+
+    if provisional:
+        digest = file_digest(uploaded_file)
+
+        # Reruns the page once the background LLM answer is in
+        @st.fragment(run_every=config.get("skill_extractor", {}).get("poll_seconds", 1))
+        def await_refined_skills():
+            future = st.session_state.get("resume_pending", {}).get(digest)
+            if future is None or future.done():
+                st.rerun()
+            st.caption(config["ui"]["provisional_skills_text"])
+
+        await_refined_skills()
   
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
@@ -107,20 +223,30 @@ def show_home():
                 st.warning(config["ui"]["no_skills_warning"])
                 return
 
+            # Render each role as soon as the model finishes streaming it
+            preview = st.empty()
+            roles = []
             with st.spinner(config["ui"]["finding_roles_text"]):
-                
-                result = agent.analyze_profile(skills, career_goal, experience_level=experience_level, current_role=current_role)
-                roles = result.get("roles", [])
-                
-                if not roles:
-                    st.warning("No suitable roles found — the model returned no valid roles.")
-                    # display raw LLM response in an expander for debugging (truncated)
-                    raw = getattr(agent.llm, "last_raw_response", None)
-                    if raw:
-                        with st.expander("LLM raw response (truncated)"):
-                            st.code(raw[:2000])
-                else:
-                    st.session_state["roles"] = roles
+                for role in agent.stream_roles(skills, career_goal, experience_level=experience_level, current_role=current_role):
+                    if not isinstance(role, dict) or not role.get("role"):
+                        continue
+                    roles.append(role)
+                    with preview.container():
+                        for streamed in roles:
+                            with st.container(border=True):
+                                st.markdown(f"### {streamed['role']}")
+                                st.markdown(streamed.get("summary", ""))
+            preview.empty()
+
+            if not roles:
+                st.warning("No suitable roles found — the model returned no valid roles.")
+                # display raw LLM response in an expander for debugging (truncated)
+                raw = getattr(agent.llm, "last_raw_response", None)
+                if raw:
+                    with st.expander("LLM raw response (truncated)"):
+                        st.code(raw[:2000])
+            else:
+                st.session_state["roles"] = roles
 
     if "roles" in st.session_state:
         st.divider()
@@ -155,7 +281,7 @@ def show_home():
                         key=f"select_{idx}",
                         use_container_width=True
                     ):
-                        # Track role selection in Cosmos DB
+                        # Track role selection in the configured progress store
                         tracker.save_role_selection(st.session_state["user_id"], role)
                         st.session_state["selected_role"] = role
                         st.switch_page("pages/study_plan.py")
@@ -1,7 +1,8 @@
 import logging
 import streamlit as st
 from config_loader import load_config
-from services.table_storage_tracker import get_progress_tracker
+from services.progress_stats import ACTIVITY_FIELDS
+from memory.repository import get_progress_repository
 from utils.style_builder import apply_styles
 
 logger = logging.getLogger(__name__)
@@ -27,15 +28,20 @@ def show_progress():
         st.info("💡 Enter a profile ID to view your progress history")
         return
     
-    tracker = get_progress_tracker()
+    tracker = get_progress_repository()
     
     if not tracker.is_available():
-        st.warning("⚠️ Progress tracking is currently unavailable. Cosmos DB connection not configured.")
-        st.info("To enable progress tracking, set COSMOS_CONNECTION_STRING environment variable.")
+        st.warning("⚠️ Progress tracking is currently unavailable. The configured progress store could not be opened.")
+        st.info("Check [progress] backend in config.toml and the storage connection settings (see the app logs).")
         return
     
+    # Stats, milestones and the newest activity come from one cached fetch
+    page_size = config["progress"]["activity_page_size"]
+    snapshot = tracker.get_progress_snapshot(user_id, recent=page_size)
+    logger.debug(f"Progress cache metrics: {tracker.metrics()}")
+    stats = snapshot["stats"]
+    
     # Display user statistics
-    stats = tracker.get_user_stats(user_id)
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -86,9 +92,17 @@ def show_progress():
     
     st.divider()
     
-    # Recent activity
+    # Recent activity: the newest page comes from the snapshot; pages added with
+    # "load more" are kept while no newer activity has been recorded
     st.subheader("📝 Recent Activity")
-    history = tracker.get_user_progress_history(user_id, limit=10)
+    history, token = snapshot["recent"], snapshot["continuation_token"]
+    # Newest row's key (RowKey on Table Storage, id on SQLite/Cosmos) and time: any new activity changes it
+    newest = history[0] if history else {}
+    head = (user_id, newest.get("RowKey") or newest.get("id"), newest.get("timestamp"))
+    more = st.session_state.get("activity_more")
+    if more and more["head"] == head:
+        history = history + more["items"]
+        token = more["token"]
     
     if history:
         for item in history:
@@ -106,6 +120,17 @@ def show_progress():
                 skill = item.get("skill")
                 level = item.get("proficiency_level")
                 st.success(f"🎓 Completed skill: **{skill}** ({level}) ({timestamp})")
+
+        if token and st.button(config["ui"]["load_more_activity_button"], key="load_more_activity"):
+            items, next_token = tracker.get_user_progress_page(
+                user_id, page_size=page_size, continuation_token=token, select=ACTIVITY_FIELDS
+            )
+            st.session_state["activity_more"] = {
+                "head": head,
+                "items": history[page_size:] + items,
+                "token": next_token,
+            }
+            st.rerun()
     else:
         st.info("No activity recorded yet. Start by taking a career assessment!")
     
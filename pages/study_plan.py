@@ -1,14 +1,41 @@
 import logging
+from typing import Optional
 import streamlit as st
 from config_loader import load_config
 from llm import create_career_agent
 from utils.style_builder import apply_styles, render_skill_badges, format_html_template
-from services.table_storage_tracker import get_progress_tracker
+from services.phase_progress import PhaseProgressState
+from memory.repository import get_progress_repository
 
 logger = logging.getLogger(__name__)
 
 config = load_config()
 
+
+def _save_phases(tracker, user_id, role_name, state, phase_numbers=None) -> Optional[int]:
+    """
+    Persist the dirty phases (optionally only `phase_numbers`) in one batch.
+    Returns how many were saved (0 when nothing was dirty), or None when the backend failed.
+    """
+    dirty = state.dirty(phase_numbers)
+    if not dirty:
+        return 0
+    if not tracker.save_phases(user_id, role_name, dirty):
+        return None
+    state.mark_saved(dirty)
+    return len(dirty)
+
+
+def _report_save(saved: Optional[int], success_message: str) -> None:
+    """Feedback for an explicit save: success only when something was written"""
+    if saved:
+        st.success(success_message)
+    elif saved is None:
+        st.warning(config["ui"]["progress_save_failed_text"])
+    else:
+        st.info(config["ui"]["no_unsaved_progress_text"])
+
+
 def show_study_plan():
     apply_styles()
     
@@ -17,15 +44,14 @@ def show_study_plan():
         return
 
     role = st.session_state["selected_role"]
-    tracker = get_progress_tracker()
+    tracker = get_progress_repository()
     user_id = st.session_state.get("user_id", "anonymous")
     
-    # Professional header with role info
-    colors = config.get("ui", {}).get("colors", {})
+    # Professional header with role info (styled by .role-header in [css])
     st.markdown(f"""
-    <div style='background: linear-gradient(135deg, {colors.get("primary", "#1E3A8A")} 0%, {colors.get("secondary", "#0EA5E9")} 100%); color: white; padding: 30px; border-radius: 8px; margin-bottom: 30px;'>
-        <h1 style='margin: 0; color: white;'>{role['role']}</h1>
-        <p style='margin: 10px 0 0 0; color: rgba(255,255,255,0.9); font-size: 18px;'>{role.get('summary', 'Career pathway plan')}</p>
+    <div class='role-header'>
+        <h1>{role['role']}</h1>
+        <p>{role.get('summary', 'Career pathway plan')}</p>
     </div>
     """, unsafe_allow_html=True)
 
@@ -36,39 +62,84 @@ def show_study_plan():
         if role.get("required_skills"):
             st.subheader("Required Skills")
             skills_html = render_skill_badges(role.get("required_skills", []), missing=False)
-            st.markdown(f"<div style='margin: 10px 0;'>{skills_html}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='skills-row'>{skills_html}</div>", unsafe_allow_html=True)
 
     with col2:
         if role.get("missing_skills"):
             st.subheader("Skills to Develop")
             skills_html = render_skill_badges(role.get("missing_skills", []), missing=True)
-            st.markdown(f"<div style='margin: 10px 0;'>{skills_html}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='skills-row'>{skills_html}</div>", unsafe_allow_html=True)
 
     st.divider()
     
-    # Get study plan
+    # Get study plan, memoized per (user, role, missing skills, current skills) for the session
     current_skills = st.session_state.get("skills", [])
-    agent = create_career_agent()
-    phases = agent.generate_study_plan(role, current_skills=current_skills) 
-   
+    plan_key = (
+        user_id,
+        role.get("role"),
+        tuple(role.get("missing_skills", [])),
+        tuple(current_skills),
+    )
+    study_plans = st.session_state.setdefault("study_plans", {})
+
     # Display phases
-    st.markdown("## 📚 Learning Roadmap")
-    
-    phase_card = config.get("ui", {}).get("phase_card", {})
-    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.markdown("## 📚 Learning Roadmap")
+    with col2:
+        regenerate = st.button(
+            config["ui"]["regenerate_plan_button"],
+            key="regenerate_plan",
+            use_container_width=True
+        )
+
+    if regenerate or plan_key not in study_plans:
+        # Render each phase as soon as the model finishes streaming it
+        preview = st.empty()
+        streamed_phases = []
+        with st.spinner(config["ui"]["generating_plan_text"]):
+            agent = create_career_agent()
+            for phase in agent.stream_study_plan(role, current_skills=current_skills, regenerate=regenerate):
+                if not isinstance(phase, dict):
+                    continue
+                streamed_phases.append(phase)
+                with preview.container():
+                    for number, streamed in enumerate(streamed_phases, start=1):
+                        with st.container(border=True):
+                            st.markdown(f"**{config['study_plan']['phase_header'].format(number=number)}** {streamed.get('duration', '')}")
+                            for item in streamed.get("focus", []):
+                                st.markdown(f"• {item}")
+        preview.empty()
+
+        # Keep failed generations out of the memo so the next visit tries again
+        if streamed_phases:
+            study_plans[plan_key] = {"phases": streamed_phases}
+        else:
+            logger.warning("Study plan generation returned no phases for role %s", role.get("role"))
+    phases = study_plans.get(plan_key, {})
+
+    # Edited vs. saved phase progress, loaded once per (user, role) for the session
+    role_name = role.get("role")
+    progress_states = st.session_state.setdefault("phase_progress", {})
+    state_key = (user_id, role_name)
+    if state_key not in progress_states:
+        progress_states[state_key] = PhaseProgressState(tracker.get_phase_states(user_id, role_name))
+    state = progress_states[state_key]
+    autosave_seconds = config.get("progress", {}).get("phase_autosave_seconds", 10)
+
     for idx, phase in enumerate(phases.get("phases", []), start=1):
         header = config["study_plan"]["phase_header"].format(number=idx)
         duration = phase.get("duration", "")
         
         st.markdown(f"""
-        <div style='background-color: {phase_card.get("background_color", "#F8FAFC")}; border-left: {phase_card.get("border_left_width", 4)}px solid {phase_card.get("border_left_color", "#0EA5E9")}; padding: {phase_card.get("padding", 16)}px; border-radius: {phase_card.get("border_radius", 6)}px; margin: 20px 0;'>
-            <div style='color: {colors.get("primary", "#1E3A8A")}; font-size: 20px; font-weight: 600; margin-bottom: 15px;'>
+        <div class='phase-container'>
+            <div class='phase-header'>
                 {header} {f"• {duration}" if duration else ""}
             </div>
         """, unsafe_allow_html=True)
         
         # Phase content
-        st.markdown(f"<div style='color: {colors.get('text_primary', '#1E293B')}; line-height: 1.8;'>", unsafe_allow_html=True)
+        st.markdown("<div class='phase-content'>", unsafe_allow_html=True)
         
         focus_items = phase.get("focus", [])
         if focus_items:
@@ -80,14 +151,12 @@ def show_study_plan():
         if skills_targeted:
             st.markdown("**Target Skills:**")
             skills_html = render_skill_badges(skills_targeted, missing=False)
-            st.markdown(f"<div style='margin: 10px 0;'>{skills_html}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='skills-row'>{skills_html}</div>", unsafe_allow_html=True)
         
         deliverable = phase.get("deliverable")
         if deliverable:
             st.markdown(f"""
-    <div style='color: #92400E;background-color: {colors.get("deliverable_bg", "#FFF3E0")}; 
-                border-left: 4px solid {colors.get("deliverable_border", "#F59E0B")}; 
-                padding: 15px; border-radius: 4px; margin-top: 12px;'>
+    <div class='deliverable-box'>
         <strong>🎯 Deliverable:</strong> {deliverable}
     </div>
     """, unsafe_allow_html=True)
@@ -97,18 +166,26 @@ def show_study_plan():
         with col1:
             completion_pct = st.slider(
                 f"Phase {idx} progress",
-                0, 100, 0,
-                key=f"phase_{idx}_progress",
+                0, 100, int(state.get(idx, "completion_percentage")),
+                key=f"phase_{role_name}_{idx}_progress",
                 label_visibility="collapsed"
             )
         
         with col2:
             hours = st.number_input(
                 f"Hours",
-                0, 1000, 0,
-                key=f"phase_{idx}_hours",
+                0, 1000, int(state.get(idx, "hours_spent")),
+                key=f"phase_{role_name}_{idx}_hours",
                 label_visibility="collapsed"
             )
+
+        # Only mark the phase dirty here; saves are batched below
+        state.update(idx, {
+            "status": "completed" if completion_pct == 100 else "in_progress",
+            "completion_percentage": completion_pct,
+            "hours_spent": hours,
+            "skills_learned": skills_targeted,
+        })
         
         with col3:
             if st.button(
@@ -116,22 +193,26 @@ def show_study_plan():
                 key=f"phase_{idx}_save",
                 use_container_width=True
             ):
-                # Track phase progress
-                tracker.save_phase_progress(
-                    user_id,
-                    role.get("role"),
-                    idx,
-                    {
-                        "status": "completed" if completion_pct == 100 else "in_progress",
-                        "completion_percentage": completion_pct,
-                        "hours_spent": hours,
-                        "skills_learned": skills_targeted,
-                    }
-                )
-                st.success(f"Phase {idx} progress saved!")
+                saved = _save_phases(tracker, user_id, role_name, state, [idx])
+                _report_save(saved, f"Phase {idx} progress saved!")
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    if phases.get("phases"):
+        # Reruns on its own timer, so pending edits are saved without another interaction
+        @st.fragment(run_every=autosave_seconds)
+        def autosave():
+            if state.is_due(autosave_seconds):
+                _save_phases(tracker, user_id, role_name, state)
+            st.caption(config["ui"]["unsaved_progress_text"] if state.dirty() else config["ui"]["progress_saved_text"])
+
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            if st.button(config["ui"]["save_all_progress_button"], key="save_all_phases", use_container_width=True):
+                _report_save(_save_phases(tracker, user_id, role_name, state), config["ui"]["progress_saved_text"])
+        with col1:
+            autosave()
+
     st.divider()
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
@@ -140,6 +221,7 @@ def show_study_plan():
             use_container_width=True,
             type="secondary"
         ):
+            _save_phases(tracker, user_id, role_name, state)
             st.switch_page("pages/home.py")
 
 show_study_plan()
@@ -0,0 +1,46 @@
+"""Process-wide registry of expensive, shareable resources (clients, agents, trackers)"""
+
+import inspect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_resources = {}
+# Re-entrant so a factory can resolve its own dependencies through the registry
+_lock = threading.RLock()
+
+
+def get_resource(name, factory):
+    """
+    Return the resource registered under `name`, building it with `factory()`
+    on first use. Construction happens once per process, even when several
+    Streamlit script threads ask for it at the same time.
+    """
+    try:
+        return _resources[name]
+    except KeyError:
+        pass
+
+    with _lock:
+        if name not in _resources:
+            logger.info("Creating shared resource '%s'", name)
+            _resources[name] = factory()
+        return _resources[name]
+
+
+def reset_resources(*names):
+    """
+    Drop registered resources (all of them when no names are given) so the next
+    `get_resource` call rebuilds them. Intended for tests and config reloads.
+    Resources exposing a synchronous `close()` are closed.
+    """
+    with _lock:
+        for name in names or list(_resources):
+            resource = _resources.pop(name, None)
+            close = getattr(resource, "close", None)
+            if callable(close) and not inspect.iscoroutinefunction(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Failed to close resource '{name}': {e}")
@@ -1,23 +1,57 @@
 """Cosmos DB Progress Tracker for NextRole AI"""
 
 import os
+import re
 import json
+import hashlib
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
-from azure.cosmos import CosmosClient, PartitionKey
+from typing import Dict, Iterable, List, Optional, Tuple
+from config_loader import load_config, load_env
+from resource_registry import get_resource
+from services.progress_stats import (
+    ACTIVITY_FIELDS,
+    EVENT_FIELDS,
+    SUMMARY_UPDATE_ATTEMPTS,
+    apply_event,
+    empty_snapshot,
+    empty_summary,
+    is_current,
+    summarize,
+    summary_to_stats,
+)
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_TYPE = "summary"
+# Stable per-phase items holding the latest progress of each phase
+PHASE_STATE_TYPE = "phase_state"
+# Transactional batches accept at most 100 operations, all in one partition
+MAX_BATCH_OPERATIONS = 100
+# Characters Cosmos DB does not allow in item ids
+_INVALID_ID_CHARS = re.compile(r"[/\\?#]")
+
+# History items newest first. Every query runs inside the user's partition
+# (partition key path /user_id); ordering on the partition key first lets the
+# composite index (/user_id ASC, /timestamp DESC) from cosmos_indexing_policy.json
+# serve the ORDER BY
+HISTORY_QUERY = (
+    "SELECT {top}{fields} FROM c WHERE c.user_id = @user_id AND c.type NOT IN (@summary, @phase_state) "
+    "ORDER BY c.user_id ASC, c.timestamp DESC"
+)
+
 
 class CosmosProgressTracker:
     """Tracks user career progress using Azure Cosmos DB"""
 
     def __init__(self):
         """Initialize Cosmos DB client and container"""
+        load_env()
         self.connection_string = os.getenv("COSMOS_CONNECTION_STRING")
         self.database_name = os.getenv("COSMOS_DATABASE_NAME", "nextrole-db")
         self.container_name = os.getenv("COSMOS_CONTAINER_NAME", "progress")
+        settings = load_config().get("progress", {})
+        self.phase_audit_rows = settings.get("phase_audit_rows", True)
         
         if not self.connection_string:
             logger.warning("COSMOS_CONNECTION_STRING not set; progress tracking disabled")
@@ -26,6 +60,8 @@ class CosmosProgressTracker:
             return
         
         try:
+            # Imported here so pages that never touch storage don't pay for the Azure SDK at startup
+            from azure.cosmos import CosmosClient
             self.client = CosmosClient.from_connection_string(self.connection_string)
             database = self.client.get_database_client(self.database_name)
             self.container = database.get_container_client(self.container_name)
@@ -43,7 +79,7 @@ class CosmosProgressTracker:
         
         try:
             item = {
-                "id": f"session_{user_id}_{datetime.utcnow().isoformat()}",
+                "id": f"session_{_id_part(user_id)}_{datetime.utcnow().isoformat()}",
                 "user_id": user_id,
                 "type": "session",
                 "timestamp": datetime.utcnow().isoformat(),
@@ -52,7 +88,7 @@ class CosmosProgressTracker:
                 "experience_level": session_data.get("experience_level"),
                 "current_role": session_data.get("current_role"),
             }
-            self.container.create_item(body=item)
+            self._point("create item", user_id, self.container.create_item, body=item)
             logger.info(f"Session saved for user {user_id}")
             return True
         except Exception as e:
@@ -67,7 +103,7 @@ class CosmosProgressTracker:
         
         try:
             item = {
-                "id": f"role_selection_{user_id}_{datetime.utcnow().isoformat()}",
+                "id": f"role_selection_{_id_part(user_id)}_{datetime.utcnow().isoformat()}",
                 "user_id": user_id,
                 "type": "role_selection",
                 "timestamp": datetime.utcnow().isoformat(),
@@ -76,7 +112,8 @@ class CosmosProgressTracker:
                 "required_skills": role.get("required_skills", []),
                 "missing_skills": role.get("missing_skills", []),
             }
-            self.container.create_item(body=item)
+            self._point("create item", user_id, self.container.create_item, body=item)
+            self._update_summary(user_id, [item])
             logger.info(f"Role selection recorded for user {user_id}: {role.get('role')}")
             return True
         except Exception as e:
@@ -84,32 +121,85 @@ class CosmosProgressTracker:
             return False
 
     def save_phase_progress(self, user_id: str, role_name: str, phase_number: int, progress: Dict) -> bool:
-        """Track completion of a study phase"""
+        """Track progress of a study phase (see `save_phases`)"""
+        return self.save_phases(user_id, role_name, {phase_number: progress})
+
+    def save_phases(self, user_id: str, role_name: str, phases: Dict[int, Dict]) -> bool:
+        """
+        Store the current progress of several phases of one role. Each phase
+        has a stable state item that is overwritten; with
+        [progress] phase_audit_rows an append-only history item is added too.
+        All items go to the user's partition in one transactional batch (one
+        per 100 operations), followed by a single summary update.
+        """
         if not self.container:
-            logger.warning("Cosmos DB not available; skipping save_phase_progress")
+            logger.warning("Cosmos DB not available; skipping save_phases")
             return False
-        
+        if not phases:
+            return True
+
         try:
-            item = {
-                "id": f"phase_progress_{user_id}_{role_name}_{phase_number}_{datetime.utcnow().isoformat()}",
-                "user_id": user_id,
-                "type": "phase_progress",
-                "timestamp": datetime.utcnow().isoformat(),
-                "role_name": role_name,
-                "phase_number": phase_number,
-                "status": progress.get("status", "in_progress"),  # in_progress, completed
-                "completion_percentage": progress.get("completion_percentage", 0),
-                "hours_spent": progress.get("hours_spent", 0),
-                "skills_learned": progress.get("skills_learned", []),
-                "notes": progress.get("notes", ""),
-            }
-            self.container.create_item(body=item)
-            logger.info(f"Phase progress recorded for user {user_id}, role {role_name}, phase {phase_number}")
+            timestamp = datetime.utcnow().isoformat()
+            items = []
+            operations = []
+            for phase_number, progress in phases.items():
+                fields = {
+                    "user_id": user_id,
+                    "timestamp": timestamp,
+                    "role_name": role_name,
+                    "phase_number": phase_number,
+                    "status": progress.get("status", "in_progress"),  # in_progress, completed
+                    "completion_percentage": progress.get("completion_percentage", 0),
+                    "hours_spent": progress.get("hours_spent", 0),
+                    "skills_learned": progress.get("skills_learned", []),
+                    "notes": progress.get("notes", ""),
+                }
+                state = {**fields, "id": _phase_state_id(user_id, role_name, phase_number), "type": PHASE_STATE_TYPE}
+                operations.append(("upsert", (state,)))
+                items.append(state)
+                if self.phase_audit_rows:
+                    operations.append(("create", ({
+                        **fields,
+                        "id": f"phase_progress_{_id_part(user_id)}_{_id_part(role_name)}_{phase_number}_{timestamp}",
+                        "type": "phase_progress",
+                    },)))
+            # Operations of one phase are adjacent and the batch size is even, so a phase never spans two batches
+            for start in range(0, len(operations), MAX_BATCH_OPERATIONS):
+                self._point(
+                    "phase batch",
+                    user_id,
+                    self.container.execute_item_batch,
+                    batch_operations=operations[start:start + MAX_BATCH_OPERATIONS],
+                    partition_key=user_id,
+                )
+            self._update_summary(user_id, items)
+            logger.info(f"Phase progress recorded for user {user_id}, role {role_name}, phases {sorted(phases)}")
             return True
         except Exception as e:
             logger.error(f"Failed to save phase progress: {e}")
             return False
 
+    def get_phase_states(self, user_id: str, role_name: str) -> Dict[int, Dict]:
+        """Current progress of each saved phase of a role, keyed by phase number"""
+        if not self.container:
+            return {}
+
+        try:
+            items = self._query(
+                "phase states",
+                user_id,
+                "SELECT c.phase_number, c.status, c.completion_percentage, c.hours_spent, c.skills_learned FROM c WHERE c.user_id = @user_id AND c.type = @phase_state AND c.role_name = @role_name",
+                [
+                    {"name": "@user_id", "value": user_id},
+                    {"name": "@phase_state", "value": PHASE_STATE_TYPE},
+                    {"name": "@role_name", "value": role_name},
+                ],
+            )
+            return {int(item.pop("phase_number")): item for item in items}
+        except Exception as e:
+            logger.error(f"Failed to load phase states: {e}")
+            return {}
+
     def save_skill_milestone(self, user_id: str, skill: str, milestone_data: Dict) -> bool:
         """Track when user completes a skill milestone"""
         if not self.container:
@@ -118,7 +208,7 @@ class CosmosProgressTracker:
         
         try:
             item = {
-                "id": f"skill_milestone_{user_id}_{skill}_{datetime.utcnow().isoformat()}",
+                "id": f"skill_milestone_{_id_part(user_id)}_{_id_part(skill)}_{datetime.utcnow().isoformat()}",
                 "user_id": user_id,
                 "type": "skill_milestone",
                 "timestamp": datetime.utcnow().isoformat(),
@@ -127,98 +217,257 @@ class CosmosProgressTracker:
                 "resources_used": milestone_data.get("resources_used", []),
                 "certification": milestone_data.get("certification", ""),
             }
-            self.container.create_item(body=item)
+            self._point("create item", user_id, self.container.create_item, body=item)
+            self._update_summary(user_id, [item])
             logger.info(f"Skill milestone recorded for user {user_id}: {skill}")
             return True
         except Exception as e:
             logger.error(f"Failed to save skill milestone: {e}")
             return False
 
-    def get_user_progress_history(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Retrieve user's progress history"""
+    def get_user_progress_page(
+        self,
+        user_id: str,
+        page_size: int = 10,
+        continuation_token: Optional[str] = None,
+        select: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Retrieve one page of the user's progress history, newest first.
+        Returns (items, continuation_token); pass the token back to fetch the
+        next page, None means there are no more items. `select` limits the
+        properties returned.
+        """
+        if not self.container:
+            logger.warning("Cosmos DB not available; returning empty history")
+            return [], None
+
+        try:
+            pages = self.container.query_items(
+                query=HISTORY_QUERY.format(top="", fields=_projection(select)),
+                parameters=self._history_parameters(user_id),
+                partition_key=user_id,
+                max_item_count=page_size,
+            ).by_page(continuation_token)
+            items = list(next(pages, []))
+            self._log_charge("history page", user_id, self._request_charge())
+            logger.info(f"Retrieved {len(items)} progress records for user {user_id}")
+            return items, pages.continuation_token
+        except Exception as e:
+            logger.error(f"Failed to retrieve progress history: {e}")
+            return [], None
+
+    def get_user_progress_history(
+        self, user_id: str, limit: int = 50, select: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        """Retrieve user's progress history, newest first; `select` limits the properties returned"""
         if not self.container:
             logger.warning("Cosmos DB not available; returning empty history")
             return []
         
         try:
-            query = f"SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.timestamp DESC OFFSET 0 LIMIT @limit"
-            items = list(self.container.query_items(
-                query=query,
-                parameters=[
-                    {"name": "@user_id", "value": user_id},
-                    {"name": "@limit", "value": limit}
-                ]
-            ))
+            items = self._query(
+                "history",
+                user_id,
+                HISTORY_QUERY.format(top=f"TOP {int(limit)} ", fields=_projection(select)),
+                self._history_parameters(user_id),
+            )
             logger.info(f"Retrieved {len(items)} progress records for user {user_id}")
             return items
         except Exception as e:
             logger.error(f"Failed to retrieve progress history: {e}")
             return []
 
+    def get_progress_snapshot(self, user_id: str, recent: int = 10) -> Dict:
+        """
+        Everything the progress page shows: stats from the summary item and the
+        first page of `recent` history items, each fetched once. Returns
+        {"stats", "recent", "continuation_token"}; stats are {} if they could
+        not be loaded.
+        """
+        if not self.container:
+            logger.warning("Cosmos DB not available; returning empty snapshot")
+            return empty_snapshot()
+
+        stats = self.get_user_stats(user_id)
+        items, token = self.get_user_progress_page(user_id, page_size=recent, select=ACTIVITY_FIELDS)
+        return {"stats": stats, "recent": items, "continuation_token": token}
+
     def get_user_stats(self, user_id: str) -> Dict:
-        """Get aggregated statistics for user"""
+        """Get aggregated statistics for user (a point read of the summary item)"""
         if not self.container:
             logger.warning("Cosmos DB not available; returning empty stats")
-            return {
-                "total_roles_explored": 0,
-                "total_phases_completed": 0,
-                "total_hours_studied": 0,
-                "skills_learned": [],
-                "roles_history": [],
-            }
-        
+            return summary_to_stats(empty_summary())
+
         try:
-            history = self.get_user_progress_history(user_id, limit=500)
-            
-            stats = {
-                "total_roles_explored": 0,
-                "total_phases_completed": 0,
-                "total_hours_studied": 0,
-                "skills_learned": [],
-                "roles_history": [],
-                "milestones": [],
-            }
-            
-            seen_roles = set()
-            for item in history:
-                item_type = item.get("type")
-                
-                if item_type == "role_selection":
-                    role_name = item.get("role_name")
-                    if role_name not in seen_roles:
-                        seen_roles.add(role_name)
-                        stats["total_roles_explored"] += 1
-                        stats["roles_history"].append({
-                            "role": role_name,
-                            "timestamp": item.get("timestamp"),
-                        })
-                
-                elif item_type == "phase_progress":
-                    if item.get("status") == "completed":
-                        stats["total_phases_completed"] += 1
-                    stats["total_hours_studied"] += item.get("hours_spent", 0)
-                
-                elif item_type == "skill_milestone":
-                    skill = item.get("skill")
-                    if skill not in stats["skills_learned"]:
-                        stats["skills_learned"].append(skill)
-                    stats["milestones"].append({
-                        "skill": skill,
-                        "level": item.get("proficiency_level"),
-                        "timestamp": item.get("timestamp"),
-                    })
-            
-            logger.info(f"Computed stats for user {user_id}: {stats['total_roles_explored']} roles, {stats['total_phases_completed']} phases completed")
+            from azure.cosmos.exceptions import CosmosResourceNotFoundError
+            try:
+                summary = _summary_from_item(self._point(
+                    "read summary", user_id, self.container.read_item, item=_summary_id(user_id), partition_key=user_id
+                ))
+            except CosmosResourceNotFoundError:
+                summary = None
+            if summary is None or not is_current(summary):
+                # History written before summaries (or this summary layout) existed
+                summary = self.rebuild_user_summary(user_id)
+            stats = summary_to_stats(summary)
+            logger.info(f"Loaded stats for user {user_id}: {stats['total_roles_explored']} roles, {stats['total_phases_completed']} phases completed")
             return stats
         except Exception as e:
-            logger.error(f"Failed to compute user stats: {e}")
+            logger.error(f"Failed to load user stats: {e}")
             return {}
 
+    def rebuild_user_summary(self, user_id: str) -> Dict:
+        """Recompute the user's summary item from the full history and store it"""
+        history = self._query(
+            "summary rebuild",
+            user_id,
+            f"SELECT {_projection(EVENT_FIELDS)} FROM c WHERE c.user_id = @user_id AND c.type != @summary",
+            [
+                {"name": "@user_id", "value": user_id},
+                {"name": "@summary", "value": SUMMARY_TYPE},
+            ],
+        )
+        summary = summarize(history)
+        self._point("upsert summary", user_id, self.container.upsert_item, body=_summary_item(user_id, summary))
+        logger.info(f"Rebuilt progress summary for user {user_id}")
+        return summary
+
+    def list_user_ids(self) -> List[str]:
+        """All users with stored progress (cross-partition; for maintenance commands)"""
+        if not self.container:
+            return []
+        return sorted(self.container.query_items(
+            query="SELECT DISTINCT VALUE c.user_id FROM c",
+            enable_cross_partition_query=True,
+        ))
+
+    def _update_summary(self, user_id: str, items: List[Dict]) -> bool:
+        """
+        Fold just-written history items into the user's summary. Concurrent
+        writers are detected with the item's ETag and the update is retried.
+        """
+        from azure.core import MatchConditions
+        from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosResourceNotFoundError
+
+        try:
+            for _ in range(SUMMARY_UPDATE_ATTEMPTS):
+                try:
+                    current = self._point(
+                        "read summary", user_id, self.container.read_item, item=_summary_id(user_id), partition_key=user_id
+                    )
+                except CosmosResourceNotFoundError:
+                    current = None
+                summary = _summary_from_item(current) if current else None
+                if summary is None or not is_current(summary):
+                    # The history already contains `items`, so a rebuild covers them
+                    self.rebuild_user_summary(user_id)
+                    return True
+                for item in items:
+                    apply_event(summary, item)
+                try:
+                    self._point(
+                        "replace summary",
+                        user_id,
+                        self.container.replace_item,
+                        item=current["id"],
+                        body=_summary_item(user_id, summary),
+                        etag=current["_etag"],
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                    return True
+                except CosmosAccessConditionFailedError:
+                    logger.debug(f"Summary for user {user_id} changed concurrently; retrying")
+            logger.warning(f"Gave up updating summary for user {user_id} after {SUMMARY_UPDATE_ATTEMPTS} conflicts")
+        except Exception as e:
+            logger.warning(f"Failed to update summary for user {user_id}: {e}")
+        return False
+
     def is_available(self) -> bool:
         """Check if Cosmos DB is available"""
         return self.container is not None
 
+    def _history_parameters(self, user_id: str) -> List[Dict]:
+        return [
+            {"name": "@user_id", "value": user_id},
+            {"name": "@summary", "value": SUMMARY_TYPE},
+            {"name": "@phase_state", "value": PHASE_STATE_TYPE},
+        ]
+
+    def _query(self, operation: str, user_id: str, query: str, parameters: List[Dict]) -> List[Dict]:
+        """All results of a query within the user's partition, logging its total RU charge"""
+        items = []
+        charge = 0.0
+        for page in self.container.query_items(query=query, parameters=parameters, partition_key=user_id).by_page():
+            items.extend(page)
+            charge += self._request_charge()
+        self._log_charge(operation, user_id, charge)
+        return items
+
+    def _point(self, operation: str, user_id: str, call, **kwargs):
+        """Run a single-item operation (read/create/upsert/replace), logging its RU charge"""
+        result = call(**kwargs)
+        self._log_charge(operation, user_id, self._request_charge())
+        return result
+
+    def _request_charge(self) -> float:
+        """
+        RU charge of the client's most recent request. The SDK keeps one set of
+        response headers per client, so under concurrent sessions a logged
+        charge can belong to a neighbouring request.
+        """
+        headers = self.container.client_connection.last_response_headers or {}
+        return float(headers.get("x-ms-request-charge", 0))
+
+    def _log_charge(self, operation: str, user_id: str, charge: float) -> None:
+        logger.info(f"Cosmos {operation} for user {user_id}: {charge:.2f} RU")
+
+
+def _projection(fields: Optional[Iterable[str]]) -> str:
+    """SELECT list for a query: the item id plus `fields`, or everything"""
+    if not fields:
+        return "*"
+    return ", ".join(f"c.{field}" for field in ("id", *fields))
+
+
+def _id_part(value) -> str:
+    """
+    `value` made safe for an item id (ids cannot contain / \\ ? #). Altered
+    values get a short hash of the original so that, say, "C#" and "C-" stay
+    distinct; values that were already safe are unchanged.
+    """
+    text = str(value)
+    safe = _INVALID_ID_CHARS.sub("-", text)
+    if safe != text:
+        safe = f"{safe}-{hashlib.sha1(text.encode('utf-8')).hexdigest()[:8]}"
+    return safe
+
+
+def _summary_id(user_id: str) -> str:
+    return f"summary_{_id_part(user_id)}"
+
+
+def _phase_state_id(user_id: str, role_name: str, phase_number: int) -> str:
+    return f"phase_state_{_id_part(user_id)}_{_id_part(role_name)}_{phase_number}"
+
+
+def _summary_item(user_id: str, summary: Dict) -> Dict:
+    return {
+        "id": _summary_id(user_id),
+        "user_id": user_id,
+        "type": SUMMARY_TYPE,
+        "updated_at": datetime.utcnow().isoformat(),
+        **summary,
+    }
+
+
+def _summary_from_item(item: Dict) -> Dict:
+    summary = empty_summary()
+    summary.update({key: item[key] for key in summary if key in item})
+    summary["version"] = item.get("version")
+    return summary
+
 
 def get_progress_tracker() -> CosmosProgressTracker:
-    """Factory function to get progress tracker instance"""
-    return CosmosProgressTracker()
+    """Factory function returning the process-wide progress tracker"""
+    return get_resource("cosmos_progress_tracker", CosmosProgressTracker)
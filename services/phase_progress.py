@@ -0,0 +1,56 @@
+"""Saved vs. edited progress of a study plan's phases, for debounced batch saves"""
+
+import time
+from typing import Dict, Iterable, Optional
+
+# Fields the user edits; a phase is dirty when one differs from its saved value
+EDITABLE_FIELDS = ("completion_percentage", "hours_spent")
+
+
+class PhaseProgressState:
+    """
+    Progress of each phase of one role's study plan, as last saved and as
+    currently edited. Edits only mark phases dirty; callers persist the dirty
+    phases together (`save_phases` on a tracker) once `is_due` or on demand,
+    then call `mark_saved`.
+    """
+
+    def __init__(self, saved: Optional[Dict[int, Dict]] = None):
+        self.saved = {number: dict(progress) for number, progress in (saved or {}).items()}
+        self.current = {number: dict(progress) for number, progress in self.saved.items()}
+        self._dirty_since = None
+
+    def get(self, phase_number: int, field: str, default=0):
+        """Current value of a phase's field"""
+        return self.current.get(phase_number, {}).get(field, default)
+
+    def update(self, phase_number: int, progress: Dict) -> bool:
+        """Record a phase's current progress; returns whether it now differs from the saved state"""
+        self.current[phase_number] = {**self.current.get(phase_number, {}), **progress}
+        changed = self._changed(phase_number)
+        if changed and self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        elif not self.dirty():
+            self._dirty_since = None
+        return changed
+
+    def dirty(self, phase_numbers: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        """Current progress of the phases with unsaved changes (optionally only `phase_numbers`)"""
+        numbers = self.current if phase_numbers is None else [n for n in phase_numbers if n in self.current]
+        return {number: dict(self.current[number]) for number in numbers if self._changed(number)}
+
+    def is_due(self, interval: float) -> bool:
+        """Whether changes have been pending for at least `interval` seconds"""
+        return self._dirty_since is not None and time.monotonic() - self._dirty_since >= interval
+
+    def mark_saved(self, phases: Dict[int, Dict]) -> None:
+        """Record that `phases` (as returned by `dirty`) were persisted"""
+        for number, progress in phases.items():
+            self.saved[number] = dict(progress)
+        if not self.dirty():
+            self._dirty_since = None
+
+    def _changed(self, phase_number: int) -> bool:
+        saved = self.saved.get(phase_number, {})
+        current = self.current.get(phase_number, {})
+        return any(current.get(field, 0) != saved.get(field, 0) for field in EDITABLE_FIELDS)
@@ -0,0 +1,125 @@
+"""Per-user progress summary, maintained incrementally by the progress trackers"""
+
+import logging
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Attempts at a read-modify-write of a summary before giving up on a conflict
+SUMMARY_UPDATE_ATTEMPTS = 5
+# Summaries are stored as a single row (a Table Storage property holds at most
+# 64 KB), so every list in them is bounded. Phases and roles dropped from the
+# lists still count towards the totals through the summary's "archived" counters.
+MAX_SUMMARY_MILESTONES = 200
+MAX_SUMMARY_PHASES = 200
+MAX_SUMMARY_ROLES = 100
+MAX_SUMMARY_SKILLS = 500
+# Bumped when the summary layout changes; stored summaries of another version are rebuilt
+SUMMARY_VERSION = 3
+
+# Summary fields holding lists/dicts (JSON-encoded where the backend needs flat values)
+SUMMARY_JSON_FIELDS = ("phases", "skills_learned", "roles_history", "milestones", "archived")
+SUMMARY_FIELDS = ("version",) + SUMMARY_JSON_FIELDS
+
+# Event types describing a phase's progress: the stable per-phase state row and
+# the append-only audit rows (and phase rows written before state rows existed)
+PHASE_EVENT_TYPES = ("phase_state", "phase_progress")
+
+# Column projections per use case, so reads skip properties nobody looks at
+# History columns `apply_event` reads
+EVENT_FIELDS = ("type", "timestamp", "status", "hours_spent", "role_name", "phase_number", "skill", "proficiency_level")
+# History columns the progress page's activity list shows
+ACTIVITY_FIELDS = EVENT_FIELDS + ("completion_percentage",)
+
+
+def empty_summary() -> Dict:
+    """Summary of a user with no recorded activity"""
+    return {
+        "version": SUMMARY_VERSION,
+        # "<role>|<phase number>" -> latest {"status", "hours_spent"} of that phase
+        "phases": {},
+        "skills_learned": [],
+        "roles_history": [],
+        "milestones": [],
+        # Totals of phases and roles trimmed from the lists above
+        "archived": {"roles": 0, "phases_completed": 0, "hours_spent": 0},
+    }
+
+
+def apply_event(summary: Dict, item: Dict) -> Dict:
+    """
+    Fold one history row into `summary`, treating it as the newest activity.
+    Lists are kept newest-first, matching a scan of the history in key order.
+    Phases are kept least recently updated first, so the oldest are trimmed
+    first (one updated again after being trimmed then counts twice).
+    """
+    item_type = item.get("type")
+    archived = summary["archived"]
+
+    if item_type == "role_selection":
+        role_name = item.get("role_name")
+        summary["roles_history"] = [entry for entry in summary["roles_history"] if entry["role"] != role_name]
+        summary["roles_history"].insert(0, {"role": role_name, "timestamp": item.get("timestamp")})
+        while len(summary["roles_history"]) > MAX_SUMMARY_ROLES:
+            summary["roles_history"].pop()
+            archived["roles"] += 1
+
+    elif item_type in PHASE_EVENT_TYPES:
+        # Phases count once with their latest state, however often they were saved
+        phases = summary["phases"]
+        key = f"{item.get('role_name')}|{item.get('phase_number')}"
+        phases.pop(key, None)
+        phases[key] = {
+            "status": item.get("status"),
+            "hours_spent": item.get("hours_spent", 0) or 0,
+        }
+        while len(phases) > MAX_SUMMARY_PHASES:
+            oldest = phases.pop(next(iter(phases)))
+            archived["phases_completed"] += oldest["status"] == "completed"
+            archived["hours_spent"] += oldest["hours_spent"]
+
+    elif item_type == "skill_milestone":
+        skill = item.get("skill")
+        summary["skills_learned"] = [skill] + [name for name in summary["skills_learned"] if name != skill]
+        del summary["skills_learned"][MAX_SUMMARY_SKILLS:]
+        summary["milestones"].insert(0, {
+            "skill": skill,
+            "level": item.get("proficiency_level"),
+            "timestamp": item.get("timestamp"),
+        })
+        del summary["milestones"][MAX_SUMMARY_MILESTONES:]
+
+    return summary
+
+
+def summarize(history: Iterable[Dict]) -> Dict:
+    """Build a summary from raw history rows (in any order; folded oldest-first by timestamp)"""
+    summary = empty_summary()
+    for item in sorted(history, key=lambda row: row.get("timestamp") or ""):
+        apply_event(summary, item)
+    return summary
+
+
+def is_current(summary: Dict) -> bool:
+    """Whether a stored summary has the current layout (otherwise rebuild it)"""
+    return summary.get("version") == SUMMARY_VERSION
+
+
+def summary_to_stats(summary: Dict) -> Dict:
+    """Shape a summary like the dict returned by `get_user_stats`"""
+    archived = summary["archived"]
+    return {
+        "total_roles_explored": len(summary["roles_history"]) + archived["roles"],
+        "total_phases_completed": archived["phases_completed"]
+        + sum(1 for phase in summary["phases"].values() if phase["status"] == "completed"),
+        "total_hours_studied": archived["hours_spent"] + sum(phase["hours_spent"] for phase in summary["phases"].values()),
+        "skills_learned": list(summary["skills_learned"]),
+        "roles_history": list(summary["roles_history"]),
+        "milestones": list(summary["milestones"]),
+    }
+
+
+def empty_snapshot() -> Dict:
+    """Snapshot of a user with no recorded activity"""
+    return {"stats": summary_to_stats(empty_summary()), "recent": [], "continuation_token": None}
+
@@ -0,0 +1,90 @@
+"""Common progress tracker interface and the config-selected backend"""
+
+import os
+import logging
+import importlib
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+from config_loader import load_config, load_env
+
+logger = logging.getLogger(__name__)
+
+# [progress] backend -> module providing get_progress_tracker()
+BACKENDS = {
+    "table": "services.table_storage_tracker",
+    "cosmos": "services.cosmos_tracker",
+    "sqlite": "services.sqlite_tracker",
+}
+
+
+class ProgressTracker(Protocol):
+    """
+    What pages and maintenance commands use from a progress tracker. Every
+    backend degrades instead of raising: writes return False and reads return
+    empty results when storage is unavailable. Continuation tokens are opaque.
+    Backends that commit writes after save_* returns (Table Storage with
+    write-behind) also offer `add_write_listener(listener)`, calling
+    listener(user_id) once that user's rows are actually stored.
+    """
+
+    def is_available(self) -> bool: ...
+
+    def save_user_session(self, user_id: str, session_data: Dict) -> bool: ...
+
+    def save_role_selection(self, user_id: str, role: Dict) -> bool: ...
+
+    def save_phase_progress(self, user_id: str, role_name: str, phase_number: int, progress: Dict) -> bool: ...
+
+    def save_phases(self, user_id: str, role_name: str, phases: Dict[int, Dict]) -> bool: ...
+
+    def save_skill_milestone(self, user_id: str, skill: str, milestone_data: Dict) -> bool: ...
+
+    def get_phase_states(self, user_id: str, role_name: str) -> Dict[int, Dict]: ...
+
+    def get_user_progress_page(
+        self,
+        user_id: str,
+        page_size: int = 10,
+        continuation_token: Optional[Any] = None,
+        select: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict], Optional[Any]]: ...
+
+    def get_user_progress_history(
+        self, user_id: str, limit: int = 50, select: Optional[Iterable[str]] = None
+    ) -> List[Dict]: ...
+
+    def get_progress_snapshot(self, user_id: str, recent: int = 10) -> Dict: ...
+
+    def get_user_stats(self, user_id: str) -> Dict: ...
+
+    def rebuild_user_summary(self, user_id: str) -> Dict: ...
+
+    def list_user_ids(self) -> List[str]: ...
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Name of the backend to use: `backend`, else [progress] backend. "auto"
+    picks Table Storage or Cosmos DB when their connection string is set and
+    falls back to the local SQLite store.
+    """
+    backend = backend or load_config().get("progress", {}).get("backend", "auto")
+    if backend == "auto":
+        load_env()
+        if os.getenv("AZURE_STORAGE_CONNECTION_STRING"):
+            return "table"
+        if os.getenv("COSMOS_CONNECTION_STRING"):
+            return "cosmos"
+        return "sqlite"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown progress backend '{backend}'; expected one of {', '.join(BACKENDS)} or auto")
+    return backend
+
+
+def get_progress_tracker(backend: Optional[str] = None) -> ProgressTracker:
+    """Factory function returning the process-wide tracker of the configured backend"""
+    # Backend modules are imported on demand so only the selected SDK is loaded
+    name = resolve_backend(backend)
+    configured = backend or load_config().get("progress", {}).get("backend", "auto")
+    logger.info(f"Using the {name} progress backend ([progress] backend = {configured})")
+    module = importlib.import_module(BACKENDS[name])
+    return module.get_progress_tracker()
@@ -0,0 +1,50 @@
+"""Recompute per-user progress summaries from raw history
+
+Run from the project root:
+    python -m services.rebuild_summaries --all
+    python -m services.rebuild_summaries user_123 user_456 --backend cosmos
+
+Without --backend the [progress] backend from config.toml is used.
+"""
+
+import argparse
+import logging
+import sys
+
+from services.progress_tracker import BACKENDS, get_progress_tracker
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("user_ids", nargs="*", help="users whose summaries to rebuild")
+    parser.add_argument("--all", action="store_true", help="rebuild every user's summary")
+    parser.add_argument("--backend", choices=(*BACKENDS, "auto"), default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if not args.user_ids and not args.all:
+        parser.error("pass user ids or --all")
+
+    tracker = get_progress_tracker(args.backend)
+    if not tracker.is_available():
+        logger.error("Progress tracker is not configured; nothing to rebuild")
+        return 1
+
+    user_ids = tracker.list_user_ids() if args.all else args.user_ids
+    failures = 0
+    for user_id in user_ids:
+        try:
+            tracker.rebuild_user_summary(user_id)
+        except Exception as e:
+            failures += 1
+            logger.error(f"Failed to rebuild summary for user {user_id}: {e}")
+
+    logger.info(f"Rebuilt {len(user_ids) - failures} of {len(user_ids)} summaries")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""SQLite Progress Tracker for NextRole AI (single-node deployments and offline runs)"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config_loader import load_config, resolve_path
+from resource_registry import get_resource
+from services.progress_stats import (
+    ACTIVITY_FIELDS,
+    apply_event,
+    empty_snapshot,
+    empty_summary,
+    is_current,
+    summarize,
+    summary_to_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+# History events keep their full payload as JSON; the columns exist for indexing
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS progress_user_time ON progress (user_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS progress_user_type ON progress (user_id, type);
+CREATE TABLE IF NOT EXISTS phase_state (
+    user_id TEXT NOT NULL,
+    role_name TEXT NOT NULL,
+    phase_number INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, role_name, phase_number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summary (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Fixed statement texts, so sqlite3's per-connection cache reuses their prepared form
+INSERT_EVENT = "INSERT INTO progress (user_id, type, timestamp, data) VALUES (?, ?, ?, ?)"
+UPSERT_PHASE_STATE = (
+    "INSERT INTO phase_state (user_id, role_name, phase_number, timestamp, data) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (user_id, role_name, phase_number) DO UPDATE SET timestamp = excluded.timestamp, data = excluded.data"
+)
+UPSERT_SUMMARY = "INSERT INTO summary (user_id, data) VALUES (?, ?) ON CONFLICT (user_id) DO UPDATE SET data = excluded.data"
+SELECT_SUMMARY = "SELECT data FROM summary WHERE user_id = ?"
+# Newest first, straight off progress_user_time; (timestamp, id) is the keyset continuation token
+SELECT_HISTORY = "SELECT id, data FROM progress WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?"
+SELECT_HISTORY_AFTER = (
+    "SELECT id, data FROM progress WHERE user_id = ? AND (timestamp, id) < (?, ?) "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+SELECT_PHASE_STATES = "SELECT data FROM phase_state WHERE user_id = ? AND role_name = ?"
+# What a summary is computed from: history plus the current phase states
+SELECT_SUMMARY_SOURCE = "SELECT data FROM progress WHERE user_id = ? UNION ALL SELECT data FROM phase_state WHERE user_id = ?"
+SELECT_USER_IDS = "SELECT user_id FROM progress UNION SELECT user_id FROM phase_state ORDER BY user_id"
+
+
+class SQLiteProgressTracker:
+    """
+    Tracks user career progress in a local SQLite database (WAL mode). Each
+    write and its summary update commit in one transaction, so no ETag
+    retries are needed. One connection is shared by all threads.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Open (and create if needed) the database at `path` or [progress] sqlite_path (relative to the project root)"""
+        settings = load_config().get("progress", {})
+        self.path = path or resolve_path(settings.get("sqlite_path", ".cache/progress.db"))
+        self.phase_audit_rows = settings.get("phase_audit_rows", True)
+        self._lock = threading.Lock()
+
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Transactions are managed explicitly (BEGIN IMMEDIATE) in _transaction
+            self.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            logger.info(f"SQLite progress tracker initialized at {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to initialize SQLite progress store: {e}")
+            self.conn = None
+
+    def save_user_session(self, user_id: str, session_data: Dict) -> bool:
+        """Save or update user session (skills, career goal, etc.)"""
+        return self._save("save_user_session", user_id, [{
+            "type": "session",
+            "timestamp": datetime.utcnow().isoformat(),
+            "skills": session_data.get("skills", []),
+            "career_goal": session_data.get("career_goal", ""),
+            "experience_level": session_data.get("experience_level", ""),
+            "current_role": session_data.get("current_role", ""),
+        }])
+
+    def save_role_selection(self, user_id: str, role: Dict) -> bool:
+        """Track when user selects a career role"""
+        return self._save("save_role_selection", user_id, [{
+            "type": "role_selection",
+            "timestamp": datetime.utcnow().isoformat(),
+            "role_name": role.get("role", ""),
+            "summary": role.get("summary", ""),
+            "required_skills": role.get("required_skills", []),
+            "missing_skills": role.get("missing_skills", []),
+        }])
+
+    def save_phase_progress(self, user_id: str, role_name: str, phase_number: int, progress: Dict) -> bool:
+        """Track progress of a study phase (see `save_phases`)"""
+        return self.save_phases(user_id, role_name, {phase_number: progress})
+
+    def save_phases(self, user_id: str, role_name: str, phases: Dict[int, Dict]) -> bool:
+        """
+        Store the current progress of several phases of one role in one
+        transaction: each phase's state row is overwritten, and with
+        [progress] phase_audit_rows a history row is added too.
+        """
+        if not phases:
+            return True
+        timestamp = datetime.utcnow().isoformat()
+        states = [
+            {
+                "type": "phase_state",
+                "timestamp": timestamp,
+                "role_name": role_name,
+                "phase_number": phase_number,
+                "status": progress.get("status", "in_progress"),
+                "completion_percentage": progress.get("completion_percentage", 0),
+                "hours_spent": progress.get("hours_spent", 0),
+                "skills_learned": progress.get("skills_learned", []),
+                "notes": progress.get("notes", ""),
+            }
+            for phase_number, progress in phases.items()
+        ]
+        events = [{**state, "type": "phase_progress"} for state in states] if self.phase_audit_rows else []
+        return self._save("save_phases", user_id, events, states)
+
+    def save_skill_milestone(self, user_id: str, skill: str, milestone_data: Dict) -> bool:
+        """Track when user completes a skill milestone"""
+        return self._save("save_skill_milestone", user_id, [{
+            "type": "skill_milestone",
+            "timestamp": datetime.utcnow().isoformat(),
+            "skill": skill,
+            "proficiency_level": milestone_data.get("proficiency_level", "beginner"),
+            "resources_used": milestone_data.get("resources_used", []),
+            "certification": milestone_data.get("certification", ""),
+        }])
+
+    def get_phase_states(self, user_id: str, role_name: str) -> Dict[int, Dict]:
+        """Current progress of each saved phase of a role, keyed by phase number"""
+        if not self.conn:
+            return {}
+
+        try:
+            with self._lock:
+                rows = self.conn.execute(SELECT_PHASE_STATES, (user_id, role_name)).fetchall()
+            states = {}
+            for (data,) in rows:
+                state = json.loads(data)
+                states[int(state["phase_number"])] = {
+                    field: state.get(field)
+                    for field in ("status", "completion_percentage", "hours_spent", "skills_learned")
+                }
+            return states
+        except Exception as e:
+            logger.error(f"Failed to load phase states: {e}")
+            return {}
+
+    def get_user_progress_page(
+        self,
+        user_id: str,
+        page_size: int = 10,
+        continuation_token: Optional[Dict] = None,
+        select: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Retrieve one page of the user's progress history, newest first.
+        Returns (items, continuation_token); pass the token back to fetch the
+        next page, None means there are no more rows. `select` limits the
+        fields returned (id is always included).
+        """
+        if not self.conn:
+            logger.warning("SQLite store not available; returning empty history")
+            return [], None
+
+        try:
+            with self._lock:
+                items, token = self._history_page(user_id, page_size, continuation_token, select)
+            logger.info(f"Retrieved {len(items)} progress records for user {user_id}")
+            return items, token
+        except Exception as e:
+            logger.error(f"Failed to retrieve progress history: {e}")
+            return [], None
+
+    def get_user_progress_history(
+        self, user_id: str, limit: int = 50, select: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        """Retrieve user's progress history, newest first"""
+        return self.get_user_progress_page(user_id, page_size=limit, select=select)[0]
+
+    def get_progress_snapshot(self, user_id: str, recent: int = 10) -> Dict:
+        """
+        Everything the progress page shows: stats from the summary row and the
+        `recent` newest history rows. Returns {"stats", "recent", "continuation_token"}.
+        """
+        if not self.conn:
+            logger.warning("SQLite store not available; returning empty snapshot")
+            return empty_snapshot()
+
+        try:
+            summary = self._current_summary(user_id)
+            with self._lock:
+                items, token = self._history_page(user_id, recent, None, ACTIVITY_FIELDS)
+            logger.info(f"Loaded progress snapshot for user {user_id}: {len(items)} recent records")
+            return {"stats": summary_to_stats(summary), "recent": items, "continuation_token": token}
+        except Exception as e:
+            logger.error(f"Failed to load progress snapshot: {e}")
+            return empty_snapshot()
+
+    def get_user_stats(self, user_id: str) -> Dict:
+        """Get aggregated statistics for user (a primary-key read of the summary row)"""
+        if not self.conn:
+            logger.warning("SQLite store not available; returning empty stats")
+            return summary_to_stats(empty_summary())
+
+        try:
+            stats = summary_to_stats(self._current_summary(user_id))
+            logger.info(f"Loaded stats for user {user_id}: {stats['total_roles_explored']} roles, {stats['total_phases_completed']} phases completed")
+            return stats
+        except Exception as e:
+            logger.error(f"Failed to load user stats: {e}")
+            return {}
+
+    def rebuild_user_summary(self, user_id: str) -> Dict:
+        """Recompute the user's summary row from the full history and store it"""
+        with self._transaction() as conn:
+            summary = self._rebuild(conn, user_id)
+        logger.info(f"Rebuilt progress summary for user {user_id}")
+        return summary
+
+    def list_user_ids(self) -> List[str]:
+        """All users with stored progress (for maintenance commands)"""
+        if not self.conn:
+            return []
+        with self._lock:
+            return [user_id for (user_id,) in self.conn.execute(SELECT_USER_IDS)]
+
+    def is_available(self) -> bool:
+        """Check if the SQLite store is available"""
+        return self.conn is not None
+
+    def close(self) -> None:
+        """Close the database connection"""
+        if self.conn:
+            with self._lock:
+                self.conn.close()
+            self.conn = None
+
+    def _save(self, operation: str, user_id: str, events: List[Dict], states: List[Dict] = ()) -> bool:
+        """
+        Insert history events and upsert phase states, folding them into the
+        user's summary in the same transaction
+        """
+        if not self.conn:
+            logger.warning(f"SQLite store not available; skipping {operation}")
+            return False
+
+        try:
+            with self._transaction() as conn:
+                conn.executemany(INSERT_EVENT, [
+                    (user_id, event["type"], event["timestamp"], json.dumps(event)) for event in events
+                ])
+                conn.executemany(UPSERT_PHASE_STATE, [
+                    (user_id, state["role_name"], state["phase_number"], state["timestamp"], json.dumps(state))
+                    for state in states
+                ])
+                summary = self._read_summary(conn, user_id)
+                if summary is None or not is_current(summary):
+                    # The history already contains these rows, so a rebuild covers them
+                    self._rebuild(conn, user_id)
+                else:
+                    for item in [*events, *states]:
+                        apply_event(summary, item)
+                    conn.execute(UPSERT_SUMMARY, (user_id, json.dumps(summary)))
+            logger.info(f"Progress recorded for user {user_id} ({operation})")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to {operation.replace('_', ' ')}: {e}")
+            return False
+
+    def _current_summary(self, user_id: str) -> Dict:
+        with self._lock:
+            summary = self._read_summary(self.conn, user_id)
+        if summary is None or not is_current(summary):
+            # History written before summaries (or this summary layout) existed
+            summary = self.rebuild_user_summary(user_id)
+        return summary
+
+    def _history_page(
+        self, user_id: str, page_size: int, continuation_token: Optional[Dict], select: Optional[Iterable[str]]
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """One page of history (caller holds the lock); one extra row tells whether more exist"""
+        if continuation_token:
+            rows = self.conn.execute(SELECT_HISTORY_AFTER, (
+                user_id, continuation_token["timestamp"], continuation_token["id"], page_size + 1,
+            )).fetchall()
+        else:
+            rows = self.conn.execute(SELECT_HISTORY, (user_id, page_size + 1)).fetchall()
+
+        fields = ("id", *select) if select else None
+        items = []
+        for row_id, data in rows[:page_size]:
+            item = {"id": row_id, **json.loads(data)}
+            items.append({field: item[field] for field in fields if field in item} if fields else item)
+        token = None
+        if len(rows) > page_size:
+            last_id, last_data = rows[page_size - 1]
+            token = {"timestamp": json.loads(last_data)["timestamp"], "id": last_id}
+        return items, token
+
+    def _read_summary(self, conn: sqlite3.Connection, user_id: str) -> Optional[Dict]:
+        row = conn.execute(SELECT_SUMMARY, (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _rebuild(self, conn: sqlite3.Connection, user_id: str) -> Dict:
+        summary = summarize(self._iter_summary_source(conn, user_id))
+        conn.execute(UPSERT_SUMMARY, (user_id, json.dumps(summary)))
+        return summary
+
+    def _iter_summary_source(self, conn: sqlite3.Connection, user_id: str) -> Iterator[Dict]:
+        for (data,) in conn.execute(SELECT_SUMMARY_SOURCE, (user_id, user_id)):
+            yield json.loads(data)
+
+    @contextmanager
+    def _transaction(self):
+        """Serialize writers in this process (lock) and across processes (BEGIN IMMEDIATE)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+
+def get_progress_tracker() -> SQLiteProgressTracker:
+    """Factory function returning the process-wide progress tracker"""
+    return get_resource("sqlite_progress_tracker", SQLiteProgressTracker)
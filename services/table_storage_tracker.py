@@ -1,23 +1,88 @@
 """Azure Table Storage Progress Tracker for NextRole AI"""
 
 import os
+import re
 import json
 import logging
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, List
-from azure.data.tables import TableClient
-from azure.core.exceptions import ResourceExistsError
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config_loader import load_config, load_env, resolve_path
+from resource_registry import get_resource
+from services.write_behind import MAX_TRANSACTION_SIZE, WriteBehindQueue
+from services.progress_stats import (
+    ACTIVITY_FIELDS,
+    EVENT_FIELDS,
+    SUMMARY_FIELDS,
+    SUMMARY_JSON_FIELDS,
+    SUMMARY_UPDATE_ATTEMPTS,
+    apply_event,
+    empty_snapshot,
+    empty_summary,
+    is_current,
+    summarize,
+    summary_to_stats,
+)
 
 logger = logging.getLogger(__name__)
 
+# .NET DateTime.MaxValue.Ticks; RowKeys start with (MAX_TICKS - now in ticks)
+# so a partition's natural key order is newest-first
+MAX_TICKS = 3155378975999999999
+_EPOCH = datetime(1, 1, 1)
+# Characters Table Storage does not allow in keys
+_INVALID_KEY_CHARS = re.compile(r"[/\\#?\x00-\x1f\x7f-\x9f]")
+
+# Table Storage returns at most 1000 entities per request
+MAX_PAGE_SIZE = 1000
+
+# Partition layout, in key order: the per-user summary row ('!'), the stable
+# per-phase state rows ('$'), then history rows (inverted ticks, so digits;
+# rows from before that scheme start with letters)
+SUMMARY_ROW_KEY = "!summary"
+PHASE_STATE_PREFIX = "$phase_"
+HISTORY_FILTER = "PartitionKey eq @user_id and RowKey ge '0'"
+# What a summary is computed from: everything but the summary itself
+SUMMARY_SOURCE_FILTER = "PartitionKey eq @user_id and RowKey gt '!summary'"
+# The summary plus the newest history rows, in one newest-first query
+SNAPSHOT_FILTER = "PartitionKey eq @user_id and (RowKey eq '!summary' or RowKey ge '0')"
+PHASE_STATE_FILTER = "PartitionKey eq @user_id and RowKey ge @start and RowKey lt @end"
+
+JSON_LIST_FIELDS = ("skills", "required_skills", "missing_skills", "skills_learned", "resources_used")
+
+# Keys are selected too: RowKey identifies rows and positions "load more"
+SNAPSHOT_COLUMNS = ["RowKey", *ACTIVITY_FIELDS, *SUMMARY_FIELDS]
+
+
+def _key_part(value) -> str:
+    return _INVALID_KEY_CHARS.sub("-", str(value))
+
+
+def newest_first_row_key(moment: datetime, *parts) -> str:
+    """Build a RowKey that sorts before every key written earlier in the same partition"""
+    delta = moment - _EPOCH
+    ticks = (delta.days * 86400 + delta.seconds) * 10_000_000 + delta.microseconds * 10
+    suffix = "_".join(_key_part(part) for part in parts)
+    return f"{MAX_TICKS - ticks:019d}_{suffix}"
+
+
+def phase_state_row_key(role_name: str, phase_number: int) -> str:
+    """RowKey of the row holding a phase's current progress (overwritten on every save)"""
+    return f"{PHASE_STATE_PREFIX}{_key_part(role_name)}_{str(phase_number).zfill(3)}"
+
 
 class TableStorageProgressTracker:
     """Tracks user career progress using Azure Table Storage"""
 
     def __init__(self):
         """Initialize Table Storage client"""
+        load_env()
         self.connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
         self.table_name = os.getenv("AZURE_STORAGE_TABLE_NAME", "progress")
+        settings = load_config().get("progress", {})
+        self.phase_audit_rows = settings.get("phase_audit_rows", True)
+        self._writer = None
+        self._write_listeners: List[Callable[[str], None]] = []
         
         if not self.connection_string:
             logger.warning("AZURE_STORAGE_CONNECTION_STRING not set; progress tracking disabled")
@@ -25,10 +90,21 @@ class TableStorageProgressTracker:
             return
         
         try:
+            # Imported here so pages that never touch storage don't pay for the Azure SDK at startup
+            from azure.data.tables import TableClient
             self.client = TableClient.from_connection_string(
                 conn_str=self.connection_string,
                 table_name=self.table_name
             )
+            if settings.get("write_behind", False):
+                self._writer = WriteBehindQueue(
+                    self.client,
+                    after_write=self._after_write,
+                    after_replay=self._after_replay,
+                    max_queue_size=settings.get("write_behind_queue_size", 1000),
+                    flush_interval=settings.get("write_behind_flush_seconds", 0.2),
+                    spill_path=resolve_path(settings.get("write_behind_spill_path")) or None,
+                )
             logger.info("Azure Table Storage progress tracker initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Table Storage: {e}")
@@ -41,10 +117,11 @@ class TableStorageProgressTracker:
             return False
         
         try:
-            timestamp = datetime.utcnow().isoformat()
+            now = datetime.utcnow()
+            timestamp = now.isoformat()
             entity = {
                 "PartitionKey": user_id,
-                "RowKey": f"session_{timestamp}",
+                "RowKey": newest_first_row_key(now, "session"),
                 "type": "session",
                 "timestamp": timestamp,
                 "skills": json.dumps(session_data.get("skills", [])),
@@ -52,7 +129,7 @@ class TableStorageProgressTracker:
                 "experience_level": session_data.get("experience_level", ""),
                 "current_role": session_data.get("current_role", ""),
             }
-            self.client.upsert_entity(entity=entity)
+            self._write_entities([entity])
             logger.info(f"Session saved for user {user_id}")
             return True
         except Exception as e:
@@ -66,10 +143,11 @@ class TableStorageProgressTracker:
             return False
         
         try:
-            timestamp = datetime.utcnow().isoformat()
+            now = datetime.utcnow()
+            timestamp = now.isoformat()
             entity = {
                 "PartitionKey": user_id,
-                "RowKey": f"role_{timestamp}",
+                "RowKey": newest_first_row_key(now, "role"),
                 "type": "role_selection",
                 "timestamp": timestamp,
                 "role_name": role.get("role", ""),
@@ -77,7 +155,7 @@ class TableStorageProgressTracker:
                 "required_skills": json.dumps(role.get("required_skills", [])),
                 "missing_skills": json.dumps(role.get("missing_skills", [])),
             }
-            self.client.upsert_entity(entity=entity)
+            self._write_entities([entity])
             logger.info(f"Role selection recorded for user {user_id}: {role.get('role')}")
             return True
         except Exception as e:
@@ -85,33 +163,81 @@ class TableStorageProgressTracker:
             return False
 
     def save_phase_progress(self, user_id: str, role_name: str, phase_number: int, progress: Dict) -> bool:
-        """Track completion of a study phase"""
+        """Track progress of a study phase (see `save_phases`)"""
+        return self.save_phases(user_id, role_name, {phase_number: progress})
+
+    def save_phases(self, user_id: str, role_name: str, phases: Dict[int, Dict]) -> bool:
+        """
+        Store the current progress of several phases of one role in one batch.
+        Each phase has a stable state row that is overwritten; with
+        [progress] phase_audit_rows an append-only history row is added too.
+        """
         if not self.client:
-            logger.warning("Table Storage not available; skipping save_phase_progress")
+            logger.warning("Table Storage not available; skipping save_phases")
             return False
-        
+        if not phases:
+            return True
+
         try:
-            timestamp = datetime.utcnow().isoformat()
-            entity = {
-                "PartitionKey": user_id,
-                "RowKey": f"phase_{role_name}_{phase_number}_{timestamp}",
-                "type": "phase_progress",
-                "timestamp": timestamp,
-                "role_name": role_name,
-                "phase_number": phase_number,
-                "status": progress.get("status", "in_progress"),
-                "completion_percentage": progress.get("completion_percentage", 0),
-                "hours_spent": progress.get("hours_spent", 0),
-                "skills_learned": json.dumps(progress.get("skills_learned", [])),
-                "notes": progress.get("notes", ""),
-            }
-            self.client.upsert_entity(entity=entity)
-            logger.info(f"Phase progress recorded for user {user_id}, role {role_name}, phase {phase_number}")
+            now = datetime.utcnow()
+            timestamp = now.isoformat()
+            entities = []
+            for phase_number, progress in phases.items():
+                fields = {
+                    "PartitionKey": user_id,
+                    "timestamp": timestamp,
+                    "role_name": role_name,
+                    "phase_number": phase_number,
+                    "status": progress.get("status", "in_progress"),
+                    "completion_percentage": progress.get("completion_percentage", 0),
+                    "hours_spent": progress.get("hours_spent", 0),
+                    "skills_learned": json.dumps(progress.get("skills_learned", [])),
+                    "notes": progress.get("notes", ""),
+                }
+                entities.append({**fields, "RowKey": phase_state_row_key(role_name, phase_number), "type": "phase_state"})
+                if self.phase_audit_rows:
+                    entities.append({
+                        **fields,
+                        "RowKey": newest_first_row_key(now, "phase", role_name, phase_number),
+                        "type": "phase_progress",
+                    })
+            self._write_entities(entities)
+            logger.info(f"Phase progress recorded for user {user_id}, role {role_name}, phases {sorted(phases)}")
             return True
         except Exception as e:
             logger.error(f"Failed to save phase progress: {e}")
             return False
 
+    def get_phase_states(self, user_id: str, role_name: str) -> Dict[int, Dict]:
+        """Current progress of each saved phase of a role, keyed by phase number"""
+        if not self.client:
+            return {}
+
+        try:
+            prefix = phase_state_row_key(role_name, "")
+            # '`' follows '_', so [prefix, prefix with '`' last) covers every key with this prefix
+            rows = self.client.query_entities(
+                PHASE_STATE_FILTER,
+                parameters={"user_id": user_id, "start": prefix, "end": prefix[:-1] + "`"},
+            )
+            states = {}
+            for row in rows:
+                row = LazyEntity(row)
+                # The prefix also matches roles named "<role_name>_..." (and roles that only
+                # differ in characters _key_part replaces); keep this role's rows only
+                if row.get("role_name") != role_name:
+                    continue
+                states[int(row["phase_number"])] = {
+                    "status": row.get("status", "in_progress"),
+                    "completion_percentage": row.get("completion_percentage", 0),
+                    "hours_spent": row.get("hours_spent", 0),
+                    "skills_learned": row.get("skills_learned", []),
+                }
+            return states
+        except Exception as e:
+            logger.error(f"Failed to load phase states: {e}")
+            return {}
+
     def save_skill_milestone(self, user_id: str, skill: str, milestone_data: Dict) -> bool:
         """Track when user completes a skill milestone"""
         if not self.client:
@@ -119,10 +245,11 @@ class TableStorageProgressTracker:
             return False
         
         try:
-            timestamp = datetime.utcnow().isoformat()
+            now = datetime.utcnow()
+            timestamp = now.isoformat()
             entity = {
                 "PartitionKey": user_id,
-                "RowKey": f"skill_{skill}_{timestamp}",
+                "RowKey": newest_first_row_key(now, "skill", skill),
                 "type": "skill_milestone",
                 "timestamp": timestamp,
                 "skill": skill,
@@ -130,124 +257,349 @@ class TableStorageProgressTracker:
                 "resources_used": json.dumps(milestone_data.get("resources_used", [])),
                 "certification": milestone_data.get("certification", ""),
             }
-            self.client.upsert_entity(entity=entity)
+            self._write_entities([entity])
             logger.info(f"Skill milestone recorded for user {user_id}: {skill}")
             return True
         except Exception as e:
             logger.error(f"Failed to save skill milestone: {e}")
             return False
 
-    def get_user_progress_history(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Retrieve user's progress history"""
+    def get_user_progress_page(
+        self,
+        user_id: str,
+        page_size: int = 10,
+        continuation_token: Optional[Dict] = None,
+        select: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Retrieve one page of the user's progress history, newest first.
+        Returns (items, continuation_token); pass the token back to fetch the
+        next page, None means there are no more rows. `select` limits the
+        columns fetched (RowKey is always included).
+        """
         if not self.client:
             logger.warning("Table Storage not available; returning empty history")
-            return []
-        
+            return [], None
+
         try:
-            filter_str = f"PartitionKey eq '{user_id}'"
-            items = list(self.client.query_entities(filter_str))
-            # Sort by timestamp descending
-            items.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            items = items[:limit]
-            
-            # Parse JSON fields back
-            for item in items:
-                if "skills" in item and isinstance(item["skills"], str):
-                    try:
-                        item["skills"] = json.loads(item["skills"])
-                    except:
-                        item["skills"] = []
-                if "required_skills" in item and isinstance(item["required_skills"], str):
-                    try:
-                        item["required_skills"] = json.loads(item["required_skills"])
-                    except:
-                        item["required_skills"] = []
-                if "missing_skills" in item and isinstance(item["missing_skills"], str):
-                    try:
-                        item["missing_skills"] = json.loads(item["missing_skills"])
-                    except:
-                        item["missing_skills"] = []
-                if "skills_learned" in item and isinstance(item["skills_learned"], str):
-                    try:
-                        item["skills_learned"] = json.loads(item["skills_learned"])
-                    except:
-                        item["skills_learned"] = []
-                if "resources_used" in item and isinstance(item["resources_used"], str):
-                    try:
-                        item["resources_used"] = json.loads(item["resources_used"])
-                    except:
-                        item["resources_used"] = []
-            
+            # $top bounds each request; RowKeys make the server order newest-first
+            pages = self.client.query_entities(
+                HISTORY_FILTER,
+                parameters={"user_id": user_id},
+                results_per_page=page_size,
+                select=["RowKey", *select] if select else None,
+            ).by_page(continuation_token=continuation_token)
+            items = [LazyEntity(item) for item in next(pages, [])]
             logger.info(f"Retrieved {len(items)} progress records for user {user_id}")
-            return items
+            return items, pages.continuation_token
         except Exception as e:
             logger.error(f"Failed to retrieve progress history: {e}")
-            return []
+            return [], None
+
+    def get_user_progress_history(
+        self, user_id: str, limit: int = 50, select: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        """Retrieve user's progress history, newest first"""
+        items = []
+        token = None
+        while len(items) < limit:
+            page, token = self.get_user_progress_page(
+                user_id,
+                page_size=min(limit - len(items), MAX_PAGE_SIZE),
+                continuation_token=token,
+                select=select,
+            )
+            items.extend(page)
+            if token is None:
+                break
+        return items[:limit]
+
+    def get_progress_snapshot(self, user_id: str, recent: int = 10) -> Dict:
+        """
+        Everything the progress page shows, from one query: the summary row and
+        the `recent` newest history rows (they are adjacent in key order).
+        Returns {"stats", "recent", "continuation_token"}; the token continues
+        the history with `get_user_progress_page`. On failure the stats are {}.
+        """
+        if not self.client:
+            logger.warning("Table Storage not available; returning empty snapshot")
+            return empty_snapshot()
+
+        try:
+            pages = self.client.query_entities(
+                SNAPSHOT_FILTER,
+                parameters={"user_id": user_id},
+                results_per_page=recent + 1,
+                select=SNAPSHOT_COLUMNS,
+            ).by_page()
+            rows = list(next(pages, []))
+            token = pages.continuation_token
+
+            summary = _summary_from_entity(rows.pop(0)) if rows and rows[0]["RowKey"] == SUMMARY_ROW_KEY else None
+            if summary is None or not is_current(summary):
+                # History written before summaries (or this summary layout) existed
+                summary = self.rebuild_user_summary(user_id)
+            if len(rows) > recent:
+                token = {"PartitionKey": user_id, "RowKey": rows[recent]["RowKey"]}
+                rows = rows[:recent]
+
+            snapshot = {
+                "stats": summary_to_stats(summary),
+                "recent": [LazyEntity(row) for row in rows],
+                "continuation_token": token,
+            }
+            logger.info(f"Loaded progress snapshot for user {user_id}: {len(rows)} recent records")
+            return snapshot
+        except Exception as e:
+            logger.error(f"Failed to load progress snapshot: {e}")
+            return {**empty_snapshot(), "stats": {}}
 
     def get_user_stats(self, user_id: str) -> Dict:
-        """Get aggregated statistics for user"""
+        """Get aggregated statistics for user (a point read of the summary row)"""
         if not self.client:
             logger.warning("Table Storage not available; returning empty stats")
-            return {
-                "total_roles_explored": 0,
-                "total_phases_completed": 0,
-                "total_hours_studied": 0,
-                "skills_learned": [],
-                "roles_history": [],
-            }
-        
+            return summary_to_stats(empty_summary())
+
         try:
-            history = self.get_user_progress_history(user_id, limit=500)
-            
-            stats = {
-                "total_roles_explored": 0,
-                "total_phases_completed": 0,
-                "total_hours_studied": 0,
-                "skills_learned": [],
-                "roles_history": [],
-                "milestones": [],
-            }
-            
-            seen_roles = set()
-            for item in history:
-                item_type = item.get("type")
-                
-                if item_type == "role_selection":
-                    role_name = item.get("role_name")
-                    if role_name not in seen_roles:
-                        seen_roles.add(role_name)
-                        stats["total_roles_explored"] += 1
-                        stats["roles_history"].append({
-                            "role": role_name,
-                            "timestamp": item.get("timestamp"),
-                        })
-                
-                elif item_type == "phase_progress":
-                    if item.get("status") == "completed":
-                        stats["total_phases_completed"] += 1
-                    stats["total_hours_studied"] += item.get("hours_spent", 0)
-                
-                elif item_type == "skill_milestone":
-                    skill = item.get("skill")
-                    if skill not in stats["skills_learned"]:
-                        stats["skills_learned"].append(skill)
-                    stats["milestones"].append({
-                        "skill": skill,
-                        "level": item.get("proficiency_level"),
-                        "timestamp": item.get("timestamp"),
-                    })
-            
-            logger.info(f"Computed stats for user {user_id}: {stats['total_roles_explored']} roles, {stats['total_phases_completed']} phases completed")
+            from azure.core.exceptions import ResourceNotFoundError
+            try:
+                summary = _summary_from_entity(self.client.get_entity(user_id, SUMMARY_ROW_KEY))
+            except ResourceNotFoundError:
+                summary = None
+            if summary is None or not is_current(summary):
+                # History written before summaries (or this summary layout) existed
+                summary = self.rebuild_user_summary(user_id)
+            stats = summary_to_stats(summary)
+            logger.info(f"Loaded stats for user {user_id}: {stats['total_roles_explored']} roles, {stats['total_phases_completed']} phases completed")
             return stats
         except Exception as e:
-            logger.error(f"Failed to compute user stats: {e}")
+            logger.error(f"Failed to load user stats: {e}")
             return {}
 
+    def rebuild_user_summary(self, user_id: str) -> Dict:
+        """
+        Recompute the user's summary row from the full history and store it.
+        The write is conditional on the summary's ETag as read before the
+        history scan (create-only if there was none), so an incremental update
+        landing in between is not overwritten: the rebuild is retried instead.
+        """
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+        from azure.data.tables import UpdateMode
+
+        for _ in range(SUMMARY_UPDATE_ATTEMPTS):
+            try:
+                etag = self.client.get_entity(user_id, SUMMARY_ROW_KEY, select=["RowKey"]).metadata["etag"]
+            except ResourceNotFoundError:
+                etag = None
+            summary = summarize(self._iter_history(user_id))
+            entity = _summary_entity(user_id, summary)
+            try:
+                if etag is None:
+                    self.client.create_entity(entity=entity)
+                else:
+                    self.client.update_entity(
+                        entity=entity,
+                        mode=UpdateMode.REPLACE,
+                        etag=etag,
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                logger.info(f"Rebuilt progress summary for user {user_id}")
+                return summary
+            except (ResourceExistsError, ResourceModifiedError):
+                logger.debug(f"Summary for user {user_id} changed during rebuild; retrying")
+        raise RuntimeError(f"summary for user {user_id} kept changing during rebuild")
+
+    def list_user_ids(self) -> List[str]:
+        """All users with stored progress (scans the table; for maintenance commands)"""
+        if not self.client:
+            return []
+        return sorted({entity["PartitionKey"] for entity in self.client.list_entities(select=["PartitionKey"])})
+
+    def _iter_history(self, user_id: str) -> Iterator[Dict]:
+        """Every phase state and history row of a user, with the columns summaries need"""
+        return self.client.query_entities(
+            SUMMARY_SOURCE_FILTER,
+            parameters={"user_id": user_id},
+            results_per_page=MAX_PAGE_SIZE,
+            select=list(EVENT_FIELDS),
+        )
+
+    def add_write_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Call listener(user_id) whenever rows of that user have been stored,
+        including write-behind commits and spill replays that land after
+        save_* returned (e.g. so a cache in front of this tracker can drop them)
+        """
+        self._write_listeners.append(listener)
+
+    def _notify_written(self, user_id: str) -> None:
+        for listener in self._write_listeners:
+            try:
+                listener(user_id)
+            except Exception as e:
+                logger.warning(f"Write listener failed for user {user_id}: {e}")
+
+    def _write_entities(self, entities: List[Dict]) -> None:
+        """
+        Upsert rows of one user, through the write-behind queue when it is
+        enabled, otherwise directly (several rows as one entity-group transaction).
+        With write-behind, returning only means the rows were queued (or spilled):
+        the save_* methods then report True before anything is durable.
+        """
+        if self._writer:
+            for entity in entities:
+                if not self._writer.submit(entity):
+                    raise RuntimeError("write-behind queue rejected the entity")
+            return
+        for start in range(0, len(entities), MAX_TRANSACTION_SIZE):
+            chunk = entities[start:start + MAX_TRANSACTION_SIZE]
+            if len(chunk) == 1:
+                self.client.upsert_entity(entity=chunk[0])
+            else:
+                self.client.submit_transaction([("upsert", entity) for entity in chunk])
+        self._after_write(entities)
+
+    def _after_write(self, entities: List[Dict]) -> None:
+        """
+        Bookkeeping once history rows of one user are stored: fold them into
+        the summary and notify write listeners
+        """
+        user_id = entities[0]["PartitionKey"]
+        events = [entity for entity in entities if entity.get("type") != "session"]
+        if events:
+            self._update_summary(user_id, events)
+        self._notify_written(user_id)
+
+    def _after_replay(self, entities: List[Dict]) -> None:
+        """
+        Bookkeeping once spilled rows of one user are stored late: they may be
+        older than rows already folded into the summary, so rebuild it from the
+        history instead of applying them as the newest activity
+        """
+        user_id = entities[0]["PartitionKey"]
+        try:
+            self.rebuild_user_summary(user_id)
+        except Exception as e:
+            logger.warning(f"Failed to rebuild summary for user {user_id} after replay: {e}")
+        self._notify_written(user_id)
+
+    def _update_summary(self, user_id: str, items: List[Dict]) -> bool:
+        """
+        Fold just-written history rows into the user's summary in one
+        read-modify-write. Concurrent writers are detected with the row's ETag
+        and the update is retried.
+        """
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+        from azure.data.tables import UpdateMode
+
+        try:
+            for _ in range(SUMMARY_UPDATE_ATTEMPTS):
+                try:
+                    current = self.client.get_entity(user_id, SUMMARY_ROW_KEY)
+                except ResourceNotFoundError:
+                    # The history already contains `items`, so a rebuild covers them
+                    self.rebuild_user_summary(user_id)
+                    return True
+                summary = _summary_from_entity(current)
+                if not is_current(summary):
+                    self.rebuild_user_summary(user_id)
+                    return True
+                for item in sorted(items, key=lambda row: row.get("timestamp") or ""):
+                    apply_event(summary, item)
+                try:
+                    self.client.update_entity(
+                        entity=_summary_entity(user_id, summary),
+                        mode=UpdateMode.REPLACE,
+                        etag=current.metadata["etag"],
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                    return True
+                except ResourceModifiedError:
+                    logger.debug(f"Summary for user {user_id} changed concurrently; retrying")
+            logger.warning(f"Gave up updating summary for user {user_id} after {SUMMARY_UPDATE_ATTEMPTS} conflicts")
+        except Exception as e:
+            logger.warning(f"Failed to update summary for user {user_id}: {e}")
+        return False
+
     def is_available(self) -> bool:
         """Check if Table Storage is available"""
         return self.client is not None
 
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued write-behind writes; True once nothing is pending"""
+        return self._writer.flush(timeout) if self._writer else True
+
+    def close(self) -> None:
+        """Flush queued writes, then close the Table Storage client and its HTTP connection pool"""
+        if self._writer:
+            self._writer.close()
+        if self.client:
+            self.client.close()
+
+
+class LazyEntity(Mapping):
+    """
+    Read-only history row whose JSON-encoded list columns are parsed on first
+    access instead of for every row fetched. A Mapping rather than a dict
+    subclass, so every read, including copies such as dict(row) or {**row},
+    goes through __getitem__ and sees the decoded values.
+    """
+
+    __slots__ = ("_row",)
+
+    def __init__(self, row: Dict):
+        self._row = dict(row)
+
+    def __getitem__(self, key):
+        value = self._row[key]
+        if key in JSON_LIST_FIELDS and isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = []
+            self._row[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._row
+
+    def __iter__(self):
+        return iter(self._row)
+
+    def __len__(self):
+        return len(self._row)
+
+    def __repr__(self):
+        return f"LazyEntity({dict(self)!r})"
+
+
+def _summary_entity(user_id: str, summary: Dict) -> Dict:
+    entity = {
+        "PartitionKey": user_id,
+        "RowKey": SUMMARY_ROW_KEY,
+        "type": "summary",
+        "updated_at": datetime.utcnow().isoformat(),
+        **summary,
+    }
+    for field in SUMMARY_JSON_FIELDS:
+        entity[field] = json.dumps(summary[field])
+    return entity
+
+
+def _summary_from_entity(entity: Dict) -> Dict:
+    summary = empty_summary()
+    summary["version"] = entity.get("version")
+    for field in SUMMARY_JSON_FIELDS:
+        if entity.get(field):
+            try:
+                summary[field] = json.loads(entity[field])
+            except ValueError:
+                pass
+    return summary
+
 
 def get_progress_tracker() -> TableStorageProgressTracker:
-    """Factory function to get progress tracker instance"""
-    return TableStorageProgressTracker()
+    """Factory function returning the process-wide progress tracker"""
+    return get_resource("table_progress_tracker", TableStorageProgressTracker)
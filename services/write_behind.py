@@ -0,0 +1,320 @@
+"""Background write-behind queue for Table Storage progress writes"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entity-group transactions accept at most 100 operations, all in one partition
+MAX_TRANSACTION_SIZE = 100
+# Entities taken off the queue per worker pass
+MAX_DRAIN = 1000
+# Minimum seconds between attempts to replay the spill file while idle
+SPILL_REPLAY_INTERVAL = 60.0
+# Conditional write attempts for one replayed entity before it is spilled again
+REPLAY_ATTEMPTS = 3
+# Failed replays of one spilled entity before it moves to the dead-letter file
+MAX_REPLAY_FAILURES = 5
+
+
+class WriteBehindQueue:
+    """
+    Accepts entity upserts without blocking the caller and writes them from a
+    daemon thread. Writes that arrive close together are grouped per
+    partition into entity-group transactions; `after_write` is called with
+    each committed group. Failed batches are retried with
+    exponential backoff. Entities that cannot be queued or written are appended
+    to a local JSONL spill file, which is replayed when the worker is idle
+    (including after a restart). A replayed entity is written only if no row
+    with a newer `timestamp` was stored meanwhile, and the written ones are
+    passed to `after_replay` rather than `after_write`, since they are not the
+    latest activity. An entity whose replay fails `MAX_REPLAY_FAILURES` times
+    moves to `<spill_path>.dead` for manual recovery. Pending writes are
+    flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        client,
+        after_write: Optional[Callable[[List[Dict]], None]] = None,
+        after_replay: Optional[Callable[[List[Dict]], None]] = None,
+        max_queue_size: int = 1000,
+        flush_interval: float = 0.2,
+        max_retries: int = 4,
+        retry_backoff: float = 0.5,
+        spill_path: Optional[str] = None,
+    ):
+        self.client = client
+        self.after_write = after_write
+        self.after_replay = after_replay
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._spill_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._last_replay = 0.0
+        self._thread = threading.Thread(target=self._run, name="progress-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entity: Dict, replay_failures: Optional[int] = None) -> bool:
+        """
+        Queue an upsert; returns False only if the entity could be neither
+        queued nor spilled. True means queued, not stored: the write can still
+        fail later (and end up in the spill file). `replay_failures` is set for
+        entities replayed from the spill file (failed replays so far).
+        """
+        if self._closed.is_set():
+            return self._spill([entity], replay_failures or 0)
+        try:
+            self._queue.put_nowait((entity, replay_failures))
+            return True
+        except queue.Full:
+            logger.warning("Write-behind queue is full; spilling entity to disk")
+            return self._spill([entity], replay_failures or 0)
+
+    def pending(self) -> int:
+        """Entities queued or being written"""
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written (or spilled)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush pending writes and stop the worker"""
+        if self._closed.is_set():
+            return
+        if not self.flush(timeout):
+            logger.warning(f"Write-behind flush timed out with {self.pending()} entities pending")
+        self._closed.set()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+                if time.monotonic() - self._last_replay >= SPILL_REPLAY_INTERVAL:
+                    self._replay_spill()
+                continue
+
+            # Linger briefly so a burst of writes shares transactions
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < MAX_DRAIN:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write([entity for entity, failures in batch if failures is None])
+                self._write_replayed([(entity, failures) for entity, failures in batch if failures is not None])
+            except Exception as e:
+                logger.error(f"Write-behind batch failed unexpectedly: {e}")
+                for entity, failures in batch:
+                    self._spill([entity], failures or 0)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Dict]) -> None:
+        partitions = OrderedDict()
+        for entity in batch:
+            rows = partitions.setdefault(entity["PartitionKey"], OrderedDict())
+            # A transaction may touch each row once; later writes merge over earlier ones
+            rows[entity["RowKey"]] = {**rows.get(entity["RowKey"], {}), **entity}
+
+        for rows in partitions.values():
+            entities = list(rows.values())
+            for start in range(0, len(entities), MAX_TRANSACTION_SIZE):
+                chunk = entities[start:start + MAX_TRANSACTION_SIZE]
+                if not self._commit(chunk):
+                    self._spill(chunk)
+                    continue
+                if self.after_write:
+                    try:
+                        self.after_write(chunk)
+                    except Exception as e:
+                        logger.warning(f"Write-behind after_write hook failed: {e}")
+
+    def _write_replayed(self, entities: List[Tuple[Dict, int]]) -> None:
+        partitions = OrderedDict()
+        for entity, failures in entities:
+            try:
+                written = self._replay_entity(entity)
+            except Exception as e:
+                failures += 1
+                if failures >= MAX_REPLAY_FAILURES:
+                    logger.error(
+                        f"Replay of spilled entity {entity.get('RowKey')} failed {failures} times ({e}); "
+                        f"moving it to the dead-letter file"
+                    )
+                    self._dead_letter([json.dumps(dict(entity))])
+                else:
+                    logger.error(f"Replay of spilled entity failed ({failures}/{MAX_REPLAY_FAILURES}): {e}")
+                    self._spill([entity], failures)
+                continue
+            if written:
+                partitions.setdefault(entity["PartitionKey"], []).append(entity)
+
+        for written in partitions.values():
+            if self.after_replay:
+                try:
+                    self.after_replay(written)
+                except Exception as e:
+                    logger.warning(f"Write-behind after_replay hook failed: {e}")
+
+    def _replay_entity(self, entity: Dict) -> bool:
+        """
+        Store a replayed entity unless the stored row is at least as new (by
+        `timestamp`). Writes are conditional (create if absent, ETag-guarded
+        update otherwise), so a newer write landing meanwhile is never
+        overwritten. Returns whether the entity was written.
+        """
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+        from azure.data.tables import UpdateMode
+
+        for _ in range(REPLAY_ATTEMPTS):
+            try:
+                stored = self.client.get_entity(entity["PartitionKey"], entity["RowKey"])
+            except ResourceNotFoundError:
+                try:
+                    self.client.create_entity(entity=entity)
+                    return True
+                except ResourceExistsError:
+                    continue
+            if (stored.get("timestamp") or "") >= (entity.get("timestamp") or ""):
+                logger.info(f"Skipping spilled entity {entity['RowKey']}: a newer write is stored")
+                return False
+            try:
+                self.client.update_entity(
+                    entity=entity,
+                    mode=UpdateMode.MERGE,
+                    etag=stored.metadata["etag"],
+                    match_condition=MatchConditions.IfNotModified,
+                )
+                return True
+            except ResourceModifiedError:
+                continue
+        raise RuntimeError(f"row {entity['RowKey']} kept changing during replay")
+
+    def _commit(self, chunk: List[Dict]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                if len(chunk) == 1:
+                    self.client.upsert_entity(entity=chunk[0])
+                else:
+                    self.client.submit_transaction([("upsert", entity) for entity in chunk])
+                logger.debug(f"Wrote {len(chunk)} entities to partition {chunk[0]['PartitionKey']}")
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up on {len(chunk)} entities after {attempt + 1} attempts: {e}")
+                    return False
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"Write of {len(chunk)} entities failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return False
+
+    def _spill(self, entities: List[Dict], replay_failures: int = 0) -> bool:
+        """Append entities to the spill file as {"entity", "replay_failures"} lines"""
+        if not self.spill_path:
+            logger.error(f"Dropping {len(entities)} progress entities: no spill file configured")
+            return False
+        lines = [json.dumps({"entity": dict(entity), "replay_failures": replay_failures}) for entity in entities]
+        try:
+            with self._spill_lock:
+                _append_lines(self.spill_path, lines)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to spill {len(entities)} progress entities: {e}")
+            return False
+
+    def _dead_letter(self, lines: List[str]) -> None:
+        try:
+            with self._spill_lock:
+                _append_lines(f"{self.spill_path}.dead", lines)
+        except Exception as e:
+            logger.error(f"Failed to write {len(lines)} lines to the dead-letter file: {e}")
+
+    def _replay_spill(self) -> None:
+        """
+        Queue entities spilled by an earlier run (or earlier in this one). The
+        spill file is first appended to `<spill_path>.replay`, which also keeps
+        whatever an interrupted replay left behind; that file is removed only
+        once its entities are queued. Unreadable lines (typically one cut short
+        by a crash) go to the dead-letter file.
+        """
+        self._last_replay = time.monotonic()
+        if not self.spill_path:
+            return
+        replay_path = f"{self.spill_path}.replay"
+        try:
+            with self._spill_lock:
+                if os.path.exists(self.spill_path):
+                    with open(self.spill_path, encoding="utf-8") as spill:
+                        _append_lines(replay_path, spill.read().splitlines())
+                    os.remove(self.spill_path)
+            if not os.path.exists(replay_path):
+                return
+            with open(replay_path, encoding="utf-8") as replay:
+                lines = [line for line in replay.read().splitlines() if line.strip()]
+        except Exception as e:
+            logger.error(f"Failed to read spilled progress entities: {e}")
+            return
+
+        entries, unreadable = [], []
+        for line in lines:
+            try:
+                record = json.loads(line)
+                # Lines without the wrapper come from spill files of earlier versions
+                entity = record.get("entity", record)
+                if not isinstance(entity, dict) or "PartitionKey" not in entity or "RowKey" not in entity:
+                    raise ValueError("not an entity")
+                entries.append((entity, int(record.get("replay_failures", 0))))
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"Skipping unreadable spill line ({e}): {line[:80]!r}")
+                unreadable.append(line)
+        if unreadable:
+            self._dead_letter(unreadable)
+
+        logger.info(f"Replaying {len(entries)} spilled progress entities")
+        for entity, failures in entries:
+            self.submit(entity, replay_failures=failures)
+        try:
+            os.remove(replay_path)
+        except OSError as e:
+            logger.error(f"Failed to remove replayed spill file {replay_path}: {e}")
+
+
+def _append_lines(path: str, lines: List[str]) -> None:
+    """Append lines to a file, first ending a line left unterminated by an interrupted write"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "ab+") as f:
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        for line in lines:
+            f.write(line.encode("utf-8") + b"\n")
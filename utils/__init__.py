@@ -1 +1 @@
-from .resume_parser import extract_text_from_pdf
+from .resume_parser import ResumeTooLargeError, extract_resume_text, extract_text_from_pdf
@@ -0,0 +1,50 @@
+"""Digest-keyed cache for parsed resumes"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from resource_registry import get_resource
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(file, chunk_size: int = DIGEST_CHUNK_SIZE) -> str:
+    """SHA-256 of an uploaded file, read in chunks; the file position is rewound afterwards"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class ResumeCache:
+    """Bounded, thread-safe LRU of parsed resumes shared across sessions"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+            return entry
+
+    def set(self, digest: str, entry: Dict) -> None:
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def get_resume_cache(max_entries: int = 128) -> ResumeCache:
+    """Return the process-wide resume cache"""
+    return get_resource("resume_cache", lambda: ResumeCache(max_entries=max_entries))
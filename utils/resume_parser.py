@@ -1,17 +1,278 @@
-from pypdf import PdfReader
+import io
 import logging
+import multiprocessing
+import threading
+import time
+import zipfile
+from typing import Callable, Dict, Iterator, Optional
+from xml.etree import ElementTree
+
+from config_loader import load_config
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(file) -> str:
-    """Extract text from uploaded PDF file"""
+MB = 1024 * 1024
+# Separates the text of PDF pages (lets later stages spot per-page headers/footers)
+PAGE_BREAK = "\f"
+
+
+class ResumeTooLargeError(ValueError):
+    """The uploaded resume exceeds [app] max_upload_mb"""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"Resume is {size / MB:.1f} MB; the limit is {limit / MB:.0f} MB")
+        self.size = size
+        self.limit = limit
+
+
+def _settings() -> dict:
+    config = load_config()
+    settings = config.get("resume_parser", {})
+    return {
+        "max_bytes": int(config.get("app", {}).get("max_upload_mb", 10) * MB),
+        "max_pages": settings.get("max_pages", 20),
+        "max_chars": settings.get("max_chars", 40000),
+        "worker_min_bytes": settings.get("worker_min_kb", 512) * 1024,
+        "worker_timeout": settings.get("worker_timeout_seconds", 20),
+        "docx_max_xml_bytes": settings.get("docx_max_xml_mb", 50) * MB,
+    }
+
+
+def file_size(file) -> int:
+    """Size of an uploaded file in bytes, without reading it"""
+    size = getattr(file, "size", None)
+    if size is None:
+        position = file.tell()
+        size = file.seek(0, io.SEEK_END)
+        file.seek(position)
+    return size
+
+
+def check_upload_size(file, max_bytes: Optional[int] = None) -> int:
+    """Raise ResumeTooLargeError unless the file fits the upload limit; returns its size"""
+    limit = max_bytes if max_bytes is not None else _settings()["max_bytes"]
+    size = file_size(file)
+    if size > limit:
+        raise ResumeTooLargeError(size, limit)
+    return size
+
+
+def iter_pdf_pages(file, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of each page lazily, stopping after `max_pages` pages or
+    once `max_chars` characters have been produced (the last page is cut).
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(file)
+    remaining = max_chars
+    for number, page in enumerate(reader.pages, start=1):
+        if max_pages is not None and number > max_pages:
+            logger.info("PDF page budget reached (%d of %d pages read)", max_pages, len(reader.pages))
+            return
+        text = page.extract_text() or ""
+        if remaining is not None:
+            if len(text) >= remaining:
+                logger.info("PDF character budget reached on page %d", number)
+                yield text[:remaining]
+                return
+            remaining -= len(text)
+        yield text
+
+
+def _join_pages(file, max_pages: Optional[int], max_chars: Optional[int]) -> str:
+    return PAGE_BREAK.join(iter_pdf_pages(file, max_pages, max_chars))
+
+
+def _extract_in_worker(data: bytes, max_pages: Optional[int], max_chars: Optional[int], conn) -> None:
+    """Worker process entry point: send ("ok", text) or ("error", message) back"""
+    try:
+        conn.send(("ok", _join_pages(io.BytesIO(data), max_pages, max_chars)))
+    except Exception as e:
+        conn.send(("error", repr(e)))
+    finally:
+        conn.close()
+
+
+def _extract_with_timeout(data: bytes, max_pages: Optional[int], max_chars: Optional[int], timeout: float) -> str:
+    """Extract in a separate process that is killed after `timeout` seconds"""
+    # spawn, not fork: the server process has live threads
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    worker = context.Process(
+        target=_extract_in_worker, args=(data, max_pages, max_chars, sender), name="pdf-extract", daemon=True
+    )
+    worker.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            raise TimeoutError(f"PDF extraction took longer than {timeout}s")
+        status, payload = receiver.recv()
+    finally:
+        receiver.close()
+        if worker.is_alive():
+            worker.terminate()
+        worker.join(1)
+    if status != "ok":
+        raise RuntimeError(f"PDF extraction worker failed: {payload}")
+    return payload
+
+
+# Format name -> extractor(file, size, settings) -> text
+EXTRACTORS: Dict[str, Callable] = {}
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_DOCUMENT = "word/document.xml"
+# Bytes looked at to tell plain text from binary
+TEXT_SNIFF_BYTES = 4096
+
+
+def register_extractor(name: str):
+    """Decorator registering an extractor for the format `sniff_format` reports as `name`"""
+    def register(extractor):
+        EXTRACTORS[name] = extractor
+        return extractor
+    return register
+
+
+def sniff_format(file) -> Optional[str]:
+    """Detect the upload's format from its leading bytes ("pdf", "docx", "txt" or None)"""
+    file.seek(0)
+    head = file.read(TEXT_SNIFF_BYTES)
+    file.seek(0)
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(file) as archive:
+                is_docx = DOCX_DOCUMENT in archive.namelist()
+        except zipfile.BadZipFile:
+            is_docx = False
+        file.seek(0)
+        return "docx" if is_docx else None
+    # Any NUL-free upload is treated as text; _extract_txt handles non-UTF-8 encodings
+    if b"\x00" not in head:
+        return "txt"
+    return None
+
+
+@register_extractor("pdf")
+def _extract_pdf(file, size: int, settings: dict) -> str:
+    if size >= settings["worker_min_bytes"]:
+        return _extract_with_timeout(file.read(), settings["max_pages"], settings["max_chars"], settings["worker_timeout"])
+    return _join_pages(file, settings["max_pages"], settings["max_chars"])
+
+
+@register_extractor("docx")
+def _extract_docx(file, size: int, settings: dict) -> str:
+    """Stream word/document.xml out of the archive, keeping only run text and paragraph breaks"""
+    max_chars = settings["max_chars"]
+    paragraphs = []
+    current = []
+    length = 0
+    with zipfile.ZipFile(file) as archive:
+        info = archive.getinfo(DOCX_DOCUMENT)
+        if info.file_size > settings["docx_max_xml_bytes"]:
+            raise ValueError(f"{DOCX_DOCUMENT} expands to {info.file_size} bytes")
+        with archive.open(info) as document:
+            for _, element in ElementTree.iterparse(document, events=("end",)):
+                tag = element.tag
+                if tag == _WORD_NS + "t":
+                    current.append(element.text or "")
+                    length += len(element.text or "")
+                elif tag in (_WORD_NS + "tab", _WORD_NS + "br"):
+                    current.append("\t" if tag == _WORD_NS + "tab" else "\n")
+                    length += 1
+                elif tag == _WORD_NS + "p":
+                    paragraphs.append("".join(current))
+                    current = []
+                    length += 1
+                    # Finished paragraphs are not needed again; keep memory flat
+                    element.clear()
+                if length >= max_chars:
+                    break
+    if current:
+        paragraphs.append("".join(current))
+    return "\n".join(paragraphs)[:max_chars]
+
+
+@register_extractor("txt")
+def _extract_txt(file, size: int, settings: dict) -> str:
+    max_chars = settings["max_chars"]
+    # UTF-8 uses at most 4 bytes per character
+    data = file.read(max_chars * 4)
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut by the read limit is still UTF-8; anything
+        # else is most likely a Windows/Latin-1 export
+        encoding = "utf-8-sig" if e.start >= len(data) - 3 else "cp1252"
+        text = data.decode(encoding, errors="replace")
+    return text[:max_chars]
+
+
+class ExtractionMetrics:
+    """Per-format extraction counts, failures and timings (process-wide)"""
+
+    def __init__(self):
+        self._formats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, chars: int, ok: bool) -> None:
+        with self._lock:
+            entry = self._formats.setdefault(name, {"count": 0, "failures": 0, "seconds": 0.0, "chars": 0})
+            entry["count"] += 1
+            entry["failures"] += 0 if ok else 1
+            entry["seconds"] += seconds
+            entry["chars"] += chars
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """{format: {"count", "failures", "seconds", "chars", "avg_ms"}}"""
+        with self._lock:
+            return {
+                name: {**entry, "avg_ms": entry["seconds"] * 1000 / entry["count"]}
+                for name, entry in self._formats.items()
+            }
+
+
+extraction_metrics = ExtractionMetrics()
+
+
+def extract_resume_text(file) -> str:
+    """
+    Extract text from an uploaded resume of any registered format, detected
+    from its content rather than its name. Files over [app] max_upload_mb
+    raise ResumeTooLargeError; unknown formats, failures and timeouts
+    return "". Output is bounded by the [resume_parser] budgets.
+    """
+    settings = _settings()
+    size = check_upload_size(file, settings["max_bytes"])
+    name = sniff_format(file)
+    extractor = EXTRACTORS.get(name)
+    if extractor is None:
+        logger.warning("Unsupported resume format (bytes=%d)", size)
+        return ""
+
+    started = time.perf_counter()
+    text = ""
+    ok = False
     try:
-        reader = PdfReader(file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        logger.info("Extracted text from PDF (chars=%d)", len(text))
+        file.seek(0)
+        text = extractor(file, size, settings)
+        ok = True
         return text
+    except TimeoutError as e:
+        logger.warning("Gave up extracting text from %s (bytes=%d): %s", name, size, e)
+        return ""
     except Exception as e:
-        logger.exception("Failed to extract text from PDF: %s", e)
+        logger.exception("Failed to extract text from %s: %s", name, e)
         return ""
+    finally:
+        elapsed = time.perf_counter() - started
+        extraction_metrics.record(name, elapsed, len(text), ok)
+        logger.info("Extracted text from %s (bytes=%d, chars=%d, %.1f ms)", name, size, len(text), elapsed * 1000)
+
+
+def extract_text_from_pdf(file) -> str:
+    """Extract text from uploaded PDF file; other registered formats are accepted too (see `extract_resume_text`)"""
+    return extract_resume_text(file)
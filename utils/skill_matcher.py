@@ -0,0 +1,140 @@
+"""Local skill extraction: one pass of a word-level Aho-Corasick automaton over a curated taxonomy"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import tomli
+
+from resource_registry import get_resource
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_PATH = Path(__file__).parent / "skill_taxonomy.toml"
+
+# Words keep the punctuation that names skills (c++, c#, .net, node.js); anything
+# else separates words, so "CI/CD", "ci-cd" and "ci cd" are the same sequence
+_WORD = re.compile(r"\.?[a-z0-9#+]+(?:\.[a-z0-9#+]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def load_taxonomy(path: Path = TAXONOMY_PATH) -> Dict[str, List[str]]:
+    """{canonical skill: phrases that name it} from the taxonomy file"""
+    with open(path, "rb") as f:
+        tables = tomli.load(f)
+    taxonomy = {}
+    for entries in tables.values():
+        for canonical, spec in entries.items():
+            if isinstance(spec, dict):
+                phrases = list(spec.get("synonyms", []))
+                if spec.get("match_name", True):
+                    phrases.append(canonical)
+            else:
+                phrases = [canonical, *spec]
+            taxonomy[canonical] = phrases
+    return taxonomy
+
+
+class SkillMatcher:
+    """
+    Finds taxonomy phrases in text with an Aho-Corasick automaton whose alphabet
+    is words rather than characters: every resume is scanned once, word by word,
+    however many phrases the taxonomy holds. Overlapping matches resolve to the
+    leftmost, then longest phrase ("react native" over "react").
+    """
+
+    def __init__(self, taxonomy: Dict[str, Iterable[str]]):
+        # State 0 is the root; per state: word transitions, failure link, (canonical, length) outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for canonical, phrases in taxonomy.items():
+            for phrase in phrases:
+                words = tokenize(phrase)
+                if words:
+                    self._add(words, canonical)
+        self._link()
+        self.skill_count = len(taxonomy)
+        logger.info("Built skill matcher (%d skills, %d states)", self.skill_count, len(self._goto))
+
+    @classmethod
+    def from_file(cls, path: Path = TAXONOMY_PATH) -> "SkillMatcher":
+        return cls(load_taxonomy(path))
+
+    def _add(self, words: List[str], canonical: str) -> None:
+        state = 0
+        for word in words:
+            following = self._goto[state].get(word)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][word] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = following
+        self._output[state] = self._output[state] + ((canonical, len(words)),)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each state also inherits the outputs of its failure state"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, following in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(word, 0)
+                self._output[following] = self._output[following] + self._output[self._fail[following]]
+                queue.append(following)
+
+    def matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """Non-overlapping (start word, end word, canonical skill) matches in text order"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = []
+        state = 0
+        for position, word in enumerate(tokenize(text)):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for canonical, length in output[state]:
+                found.append((position - length + 1, -length, canonical))
+
+        found.sort()
+        kept = []
+        end = -1
+        for start, negative_length, canonical in found:
+            if start > end:
+                end = start - negative_length - 1
+                kept.append((start, end, canonical))
+        return kept
+
+    def count(self, text: str) -> Dict[str, int]:
+        """{canonical skill: mentions}, in order of first mention"""
+        counts = {}
+        for _, _, canonical in self.matches(text):
+            counts[canonical] = counts.get(canonical, 0) + 1
+        return counts
+
+    def extract(self, text: str, min_confident_skills: int = 8) -> Dict:
+        """
+        Provisional skill extraction shaped like the LLM's answer:
+        {"skills", "current_role": None, "experience_level": None, "confident"}.
+        Skills are ordered by mentions; `confident` means at least
+        `min_confident_skills` distinct skills were found.
+        """
+        counts = self.count(text or "")
+        skills = sorted(counts, key=counts.get, reverse=True)
+        return {
+            "skills": skills,
+            "current_role": None,
+            "experience_level": None,
+            "confident": len(skills) >= min_confident_skills,
+        }
+
+
+def get_skill_matcher(path: Optional[Path] = None) -> SkillMatcher:
+    """Process-wide matcher over the bundled taxonomy, built on first use"""
+    return get_resource("skill_matcher", lambda: SkillMatcher.from_file(path or TAXONOMY_PATH))
@@ -1,31 +1,87 @@
 """Style builder utility to generate CSS from config"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
 import streamlit as st
 from config_loader import load_config
 
+logger = logging.getLogger(__name__)
 
-def build_css_from_config():
-    """Build complete CSS stylesheet from config"""
-    config = load_config()
-    
-    css_template = config.get("css", {}).get("global", "")
+# Streamlit serves this folder (next to app.py) at app/static/ when
+# server.enableStaticServing is on
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+STYLESHEET_NAME = "styles.css"
+
+# `{name}` placeholders; every other brace in a template is literal text
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class CompiledTemplate:
+    """
+    A template pre-split into literal segments and named slots. Slots whose
+    values are known at compile time (colors, sizes, ...) are baked into the
+    literal text, so rendering is a single join over the remaining parts.
+    """
+
+    def __init__(self, template, defaults):
+        parts = []
+        slots = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(template):
+            name = match.group(1)
+            parts.append(template[pos:match.start()])
+            if name in defaults:
+                parts.append(format(defaults[name]))
+            else:
+                slots.append((len(parts), name))
+                parts.append(match.group(0))
+            pos = match.end()
+        parts.append(template[pos:])
+
+        self.template = template
+        self.defaults = defaults
+        self.parts = parts
+        self.slots = slots
+        self.static = "".join(parts) if not slots else None
+
+    def render(self, values=None):
+        """Fill the open slots; placeholders without a value stay as literal `{name}`"""
+        if values and not self.defaults.keys().isdisjoint(values):
+            # Caller overrides a baked-in default: recompile for this call only
+            return CompiledTemplate(self.template, {**self.defaults, **values}).render()
+        if self.static is not None:
+            return self.static
+        parts = list(self.parts)
+        if values:
+            for index, name in self.slots:
+                if name in values:
+                    parts[index] = format(values[name])
+        return "".join(parts)
+
+
+# Compiled artifacts for the config object they were built from; a reloaded
+# config (see config_loader.load_config) is a new object and invalidates them.
+_compiled = {"config": None, "css": None, "style_tag": None, "html": {}}
+
+
+def _compiled_for(config):
+    global _compiled
+    if _compiled["config"] is not config:
+        _compiled = {"config": config, "css": None, "style_tag": None, "html": {}}
+    return _compiled
+
+
+def _css_format_map(config):
     colors = config.get("ui", {}).get("colors", {})
     typography = config.get("ui", {}).get("typography", {})
     badge = config.get("ui", {}).get("skills_badge", {})
     card = config.get("ui", {}).get("role_card", {})
     phase = config.get("ui", {}).get("phase_card", {})
-    
-    # Safely format CSS template: escape all literal braces then
-    # restore placeholders for keys we intend to format.
-    # This allows the CSS to contain normal `{}` blocks without
-    # causing format() KeyError for unknown fields.
-    if not css_template:
-        return ""
-
-    # Escape all braces so literal CSS braces are preserved
-    escaped = css_template.replace('{', '{{').replace('}', '}}')
 
-    # Prepare the mapping of available placeholders
-    format_map = {
+    return {
         "primary": colors.get("primary", "#1E3A8A"),
         "secondary": colors.get("secondary", "#0EA5E9"),
         "accent": colors.get("accent", "#10B981"),
@@ -36,6 +92,8 @@ def build_css_from_config():
         "text_primary": colors.get("text_primary", "#1E293B"),
         "text_secondary": colors.get("text_secondary", "#64748B"),
         "border": colors.get("border", "#E2E8F0"),
+        "deliverable_bg": colors.get("deliverable_bg", "#FFF3E0"),
+        "deliverable_border": colors.get("deliverable_border", "#F59E0B"),
         "main_header_size": typography.get("main_header_size", 32),
         "subheader_size": typography.get("subheader_size", 24),
         "section_header_size": typography.get("section_header_size", 20),
@@ -55,37 +113,14 @@ def build_css_from_config():
         "phase_radius": phase.get("border_radius", 6),
     }
 
-    # Un-escape only the placeholders that we will format
-    for key in format_map.keys():
-        escaped = escaped.replace('{{' + key + '}}', '{' + key + '}')
-
-    css = escaped.format(**format_map)
-
-    return css
-
-
-def apply_styles():
-    """Apply CSS styles to the page"""
-    css = build_css_from_config()
-    st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
-
 
-def format_html_template(template_name, **kwargs):
-    """Format an HTML template from config with provided values"""
-    config = load_config()
-    
-    html_templates = config.get("html", {})
-    template = html_templates.get(template_name, "")
-    
-    if not template:
-        return ""
-    
+def _html_format_params(config):
     colors = config.get("ui", {}).get("colors", {})
     typography = config.get("ui", {}).get("typography", {})
     badge = config.get("ui", {}).get("skills_badge", {})
     phase = config.get("ui", {}).get("phase_card", {})
-    
-    format_params = {
+
+    return {
         "primary": colors.get("primary", "#1E3A8A"),
         "secondary": colors.get("secondary", "#0EA5E9"),
         "accent": colors.get("accent", "#10B981"),
@@ -107,38 +142,90 @@ def format_html_template(template_name, **kwargs):
         "phase_padding": phase.get("padding", 16),
         "phase_radius": phase.get("border_radius", 6),
     }
-    
-    # Merge user-provided kwargs
-    format_params.update(kwargs)
 
-    # Escape all braces in the template, then un-escape only the
-    # placeholders we intend to replace. This allows templates to
-    # safely include literal `{}` without causing KeyError.
-    escaped = template.replace('{', '{{').replace('}', '}}')
-    for key in format_params.keys():
-        escaped = escaped.replace('{{' + key + '}}', '{' + key + '}')
 
-    return escaped.format(**format_params)
+def build_css_from_config():
+    """Build complete CSS stylesheet from config (compiled once per config version)"""
+    config = load_config()
+    compiled = _compiled_for(config)
 
+    if compiled["css"] is None:
+        # Literal CSS braces are preserved; only known `{placeholders}` are substituted
+        css_template = config.get("css", {}).get("global", "")
+        compiled["css"] = CompiledTemplate(css_template, _css_format_map(config)).render() if css_template else ""
 
-def render_skill_badges(skills, missing=False):
-    """Render skill badges from a list of skills"""
+    return compiled["css"]
+
+
+def publish_stylesheet(css):
+    """
+    Write `css` to static/ and return its URL (versioned by content hash so
+    browsers cache it until the config changes), or None if it cannot be served
+    """
+    try:
+        if not st.get_option("server.enableStaticServing"):
+            return None
+        path = STATIC_DIR / STYLESHEET_NAME
+        data = css.encode("utf-8")
+        if not path.is_file() or path.read_bytes() != data:
+            STATIC_DIR.mkdir(exist_ok=True)
+            # Replace atomically so a concurrent request never sees a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=STATIC_DIR, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not publish stylesheet, inlining it instead: {e}")
+        return None
+    version = hashlib.sha256(data).hexdigest()[:12]
+    return f"app/static/{STYLESHEET_NAME}?v={version}"
+
+
+def _style_tag(config):
+    compiled = _compiled_for(config)
+
+    if compiled["style_tag"] is None:
+        css = build_css_from_config()
+        url = publish_stylesheet(css) if css and config.get("css", {}).get("serve_static", False) else None
+        # A one-line @import is all that goes over the websocket on each rerun
+        compiled["style_tag"] = f'<style>@import url("{url}");</style>' if url else f"<style>{css}</style>"
+
+    return compiled["style_tag"]
+
+
+def apply_styles():
+    """
+    Apply CSS styles to the page. Streamlit drops elements that a rerun does
+    not emit again, so this runs on every rerun; with static serving it only
+    sends a reference to the cached stylesheet.
+    """
+    st.markdown(_style_tag(load_config()), unsafe_allow_html=True)
+
+
+def get_html_template(template_name):
+    """Return the compiled `[html]` template for `template_name`, or None if it is not configured"""
     config = load_config()
-    colors = config.get("ui", {}).get("colors", {})
-    badge = config.get("ui", {}).get("skills_badge", {})
-    
-    if missing:
-        bg_color = "#FEF3C7"
-        border_color = colors.get("warning", "#F59E0B")
-        text_color = "#92400E"
-    else:
-        bg_color = badge.get("background_color", "#EFF6FF")
-        border_color = badge.get("border_color", "#0EA5E9")
-        text_color = colors.get("primary", "#1E3A8A")
-    
-    badges_html = ""
-    for skill in skills:
-        badge_html = f"""<span style='display: inline-block; background-color: {bg_color}; border: 1px solid {border_color}; color: {text_color}; padding: {badge.get("padding", 10)}px {badge.get("padding", 10) * 1.5}px; border-radius: {badge.get("border_radius", 6)}px; font-size: {badge.get("font_size", 13)}px; font-weight: 500; margin: 4px;'>{skill}</span>"""
-        badges_html += badge_html
-    
-    return badges_html
+    templates = _compiled_for(config)["html"]
+
+    if template_name not in templates:
+        template = config.get("html", {}).get(template_name, "")
+        templates[template_name] = CompiledTemplate(template, _html_format_params(config)) if template else None
+
+    return templates[template_name]
+
+
+def format_html_template(template_name, **kwargs):
+    """Format an HTML template from config with provided values"""
+    template = get_html_template(template_name)
+
+    if template is None:
+        return ""
+
+    return template.render(kwargs)
+
+
+def render_skill_badges(skills, missing=False):
+    """Render skill badges from a list of skills (styled by the .skill-badge rules in [css])"""
+    prefix = "<span class='skill-badge skill-badge-missing'>" if missing else "<span class='skill-badge'>"
+    return "".join(f"{prefix}{skill}</span>" for skill in skills)